@@ -0,0 +1,92 @@
+import argparse
+import csv
+import json
+import sys
+
+import degrees
+from batch import POLICIES, resolve_person
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report the degrees of separation from one person to "
+                    "everyone else, from a single search. Writes one CSV "
+                    "row per person reached and a summary to stderr."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("person", help="name or IMDB id of the source")
+    parser.add_argument(
+        "-o", "--output", default="-",
+        help="file to write rows to, or - for stdout (the default)"
+    )
+    parser.add_argument(
+        "--parents", action="store_true",
+        help="add the movie and person each person was reached through, "
+             "so any path can be followed back to the source"
+    )
+    parser.add_argument(
+        "--unreachable", action="store_true",
+        help="also write rows for people who cannot be reached"
+    )
+    parser.add_argument(
+        "--ambiguous", choices=POLICIES, default="error",
+        help="how to resolve a name shared by several people"
+    )
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, compact=True, cache=not args.no_cache)
+    person_id, error = resolve_person(args.person, args.ambiguous)
+    if error is not None:
+        sys.exit(error)
+    distances = degrees.distances_from(person_id, parents=args.parents)
+
+    if args.output == "-":
+        outfile = sys.stdout
+    else:
+        outfile = open(args.output, "w", newline="", encoding="utf-8")
+    with outfile:
+        write_rows(
+            csv.writer(outfile), degrees.graph, distances,
+            args.parents, args.unreachable
+        )
+
+    summary = {
+        "source_id": person_id,
+        "reached": distances.reached(),
+        "people": degrees.graph.person_count(),
+        "histogram": distances.histogram,
+    }
+    print(json.dumps(summary), file=sys.stderr)
+
+
+def write_rows(writer, graph, distances, parents, unreachable):
+    """
+    Writes a header and one (person_id, distance) row per person, with
+    the parent movie and person ids if `parents`. Rows are written as
+    they are produced, so nothing proportional to the number of people
+    is built up besides the distances themselves.
+    """
+    header = ["person_id", "distance"]
+    if parents:
+        header += ["movie_id", "parent_id"]
+    writer.writerow(header)
+
+    person_ids = graph.person_ids
+    movie_ids = graph.movie_ids
+    for p in range(graph.person_count()):
+        d = distances.distance(p)
+        if d is None and not unreachable:
+            continue
+        row = [person_ids[p], "" if d is None else d]
+        if parents:
+            m = distances.parent_movies[p]
+            if m < 0:
+                row += ["", ""]
+            else:
+                row += [movie_ids[m], person_ids[distances.parent_people[p]]]
+        writer.writerow(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+
+import degrees
+
+# How ambiguous names are resolved: pick the person with the lowest
+# numeric IMDB id, or report the query as an error listing candidates
+POLICIES = ("lowest", "error")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer many degrees queries without prompting. Reads "
+                    "one 'source,target' pair per line (names or IMDB ids, "
+                    "quoted if they contain commas) and writes one JSON "
+                    "line per query."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "-i", "--input", default="-",
+        help="file of queries, or - for stdin (the default)"
+    )
+    parser.add_argument(
+        "-o", "--output", default="-",
+        help="file to write results to, or - for stdout (the default)"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=os.cpu_count(),
+        help="number of worker processes (default: one per CPU)"
+    )
+    parser.add_argument(
+        "--ambiguous", choices=POLICIES, default="error",
+        help="how to resolve names shared by several people"
+    )
+    parser.add_argument("--bidirectional", action="store_true")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    options = {
+        "compact": args.compact,
+        "cache": not args.no_cache,
+    }
+    degrees.load_data(args.directory, **options)
+
+    if args.input == "-":
+        infile = sys.stdin
+    else:
+        infile = open(args.input, encoding="utf-8")
+    if args.output == "-":
+        outfile = sys.stdout
+    else:
+        outfile = open(args.output, "w", encoding="utf-8")
+    method = "bidirectional" if args.bidirectional else "bfs"
+    with infile, outfile:
+        results = run_batch(
+            read_queries(infile), method, args.ambiguous, args.workers,
+            args.directory, options
+        )
+        for result in results:
+            outfile.write(json.dumps(result) + "\n")
+
+
+def read_queries(lines):
+    """
+    Yields (source, target) pairs from CSV lines, skipping blank lines.
+    """
+    for row in csv.reader(lines):
+        if not row:
+            continue
+        if len(row) != 2:
+            yield (",".join(row), None)
+        else:
+            yield (row[0].strip(), row[1].strip())
+
+
+def run_batch(queries, method, policy, workers, directory, options):
+    """
+    Answers every (source, target) query, yielding results in input
+    order.
+
+    Workers are forked after the data is loaded so they share the parent's
+    graph (and, with a snapshot, the same mapped pages). Where fork is
+    unavailable each worker loads the data itself, preferably from the
+    snapshot.
+    """
+    jobs = ((source, target, method, policy) for source, target in queries)
+    if workers <= 1:
+        yield from map(answer, jobs)
+        return
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        pool = context.Pool(workers)
+    else:
+        pool = multiprocessing.Pool(
+            workers, initializer=_load_worker, initargs=(directory, options)
+        )
+    with pool:
+        yield from pool.imap(answer, jobs, chunksize=16)
+
+
+def _load_worker(directory, options):
+    degrees.load_data(directory, **options)
+
+
+def answer(job):
+    """
+    Resolves and answers one query, returning a JSON-ready dictionary.
+    """
+    source, target, method, policy = job
+    result = {"source": source, "target": target}
+    if target is None:
+        result["error"] = "expected two fields"
+        return result
+
+    for key, query in (("source", source), ("target", target)):
+        person_id, error = resolve_person(query, policy)
+        if error is not None:
+            result["error"] = error
+            return result
+        result[f"{key}_id"] = person_id
+
+    path = degrees.shortest_path(
+        result["source_id"], result["target_id"], method=method
+    )
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [
+            {"movie_id": movie_id, "person_id": person_id}
+            for movie_id, person_id in path
+        ]
+    return result
+
+
+def resolve_person(query, policy):
+    """
+    Returns (person_id, error) for a name or IMDB id.
+
+    A string that is a known IMDB id is taken as one; otherwise it is
+    looked up as a name. Names shared by several people are resolved
+    according to `policy` (see POLICIES).
+    """
+    if degrees.person_exists(query):
+        return query, None
+
+    person_ids = degrees.people_for_name(query)
+    if len(person_ids) == 0:
+        return None, f"person not found: {query}"
+    person_ids.sort(key=_id_order)
+    if len(person_ids) > 1 and policy == "error":
+        return None, f"ambiguous name: {query} ({', '.join(person_ids)})"
+    return person_ids[0], None
+
+
+def _id_order(person_id):
+    """
+    Sort key putting numeric IMDB ids in numeric order.
+    """
+    return (len(person_id), person_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import argparse
+import json
+import random
+import resource
+import sys
+import time
+
+import degrees
+from util import SearchStats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare one-sided and bidirectional search on a dataset."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("-n", "--queries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--compact", action="store_true",
+        help="run the searches on the compact integer-indexed graph"
+    )
+    parser.add_argument(
+        "--landmarks", type=int, metavar="K",
+        help="also benchmark A* guided by a K-landmark index, which is "
+             "often slower than bfs on small-world graphs"
+    )
+    parser.add_argument(
+        "--json", metavar="FILE",
+        help="also write the results, with load time, peak RSS and query "
+             "latency percentiles, to FILE as JSON"
+    )
+    args = parser.parse_args()
+
+    print("Loading data...")
+    start = time.perf_counter()
+    degrees.load_data(args.directory, compact=args.compact)
+    load_seconds = time.perf_counter() - start
+    print(f"Data loaded in {load_seconds:.3f}s.")
+
+    methods = ["bfs", "bidirectional"]
+    if args.landmarks:
+        degrees.load_landmark_index(args.directory, args.landmarks)
+        methods.append("alt")
+
+    pairs = random_pairs(args.queries, args.seed)
+    results = {}
+    for method in methods:
+        results[method] = run_queries(pairs, method)
+
+    # Both methods must agree on the length of every shortest path
+    for i, (source, target) in enumerate(pairs):
+        lengths = {
+            method: results[method]["lengths"][i] for method in results
+        }
+        if len(set(lengths.values())) != 1:
+            raise RuntimeError(
+                f"methods disagree for {source} -> {target}: {lengths}"
+            )
+
+    print(f"{len(pairs)} random queries on {args.directory}")
+    for method, result in results.items():
+        print(
+            f"  {method:>13}: {result['expanded']:>12} people expanded, "
+            f"peak frontier {result['peak_frontier']}, "
+            f"{result['seconds']:.3f}s"
+        )
+    baseline = results["bfs"]["expanded"]
+    for method in methods[1:]:
+        improved = results[method]["expanded"]
+        if improved == 0:
+            continue
+        ratio = baseline / improved
+        if ratio >= 1:
+            print(f"Expansion reduction ({method}): {ratio:.2f}x")
+        else:
+            print(
+                f"Expansion increase ({method}): {1 / ratio:.2f}x "
+                f"more people expanded than bfs"
+            )
+
+    if args.json:
+        report = {
+            "directory": args.directory,
+            "compact": args.compact,
+            "queries": len(pairs),
+            "seed": args.seed,
+            "load_seconds": load_seconds,
+            "peak_rss_bytes": peak_rss(),
+            "methods": {
+                method: {
+                    "expanded": result["expanded"],
+                    "peak_frontier": result["peak_frontier"],
+                    "seconds": result["seconds"],
+                    "latency": percentiles(result["latencies"]),
+                }
+                for method, result in results.items()
+            },
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Results written to {args.json}.")
+
+
+def random_pairs(n, seed):
+    """
+    Returns `n` pairs of distinct person ids, chosen at random
+    with a fixed seed so runs can be compared.
+    """
+    rng = random.Random(seed)
+    if degrees.graph is not None:
+        person_ids = list(degrees.graph.person_ids)
+    else:
+        person_ids = sorted(degrees.people)
+    return [tuple(rng.sample(person_ids, 2)) for _ in range(n)]
+
+
+def run_queries(pairs, method):
+    """
+    Runs shortest_path over every pair with the given method, returning
+    total people expanded, the largest frontier any search reached,
+    total wall time, and each query's latency and path length.
+    """
+    stats = SearchStats()
+    lengths = []
+    latencies = []
+    start = time.perf_counter()
+    for source, target in pairs:
+        query_start = time.perf_counter()
+        path = degrees.shortest_path(source, target, method=method, stats=stats)
+        latencies.append(time.perf_counter() - query_start)
+        lengths.append(None if path is None else len(path))
+    return {
+        "expanded": stats.expanded,
+        "peak_frontier": stats.peak_frontier,
+        "seconds": time.perf_counter() - start,
+        "latencies": latencies,
+        "lengths": lengths,
+    }
+
+
+def percentiles(latencies):
+    """
+    Summarises query latencies in seconds as the mean, the 50th, 90th
+    and 99th percentiles (nearest rank) and the maximum.
+    """
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+    summary = {"mean": sum(ordered) / len(ordered)}
+    for p in (50, 90, 99):
+        rank = max(1, -(-p * len(ordered) // 100))
+        summary[f"p{p}"] = ordered[rank - 1]
+    summary["max"] = ordered[-1]
+    return summary
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    if sys.platform == "darwin":
+        return peak
+    return peak * 1024
+
+
+if __name__ == "__main__":
+    main()
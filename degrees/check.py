@@ -0,0 +1,456 @@
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+import degrees
+from components import label_graph
+from generate import generate
+from graph import build_graph, load_graph, release_year
+from paths import shortest_path_dag, yen_paths
+from snapshot import load_snapshot, save_snapshot
+from updates import Delta
+from util import breadth_first_search, iterative_deepening_search
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cross-check the degrees backends and indexes against "
+                    "each other. Exits non-zero if any check fails."
+    )
+    parser.add_argument(
+        "directory", nargs="?",
+        default=os.path.join(os.path.dirname(__file__) or ".", "small")
+    )
+    parser.add_argument(
+        "--generated", type=int, metavar="N", default=5000,
+        help="also check a generated dataset with N star rows "
+             "(default: 5000, 0 to skip)"
+    )
+    parser.add_argument("-n", "--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        # Work on copies so snapshots and updates never touch the originals
+        datasets = [copy_dataset(args.directory, scratch, "given")]
+        if args.generated:
+            path = os.path.join(scratch, "generated")
+            generate(path, args.generated, seed=args.seed)
+            datasets.append(path)
+
+        failures = 0
+        for directory in datasets:
+            for check in CHECKS:
+                try:
+                    check(directory, args.queries, args.seed)
+                except AssertionError as e:
+                    failures += 1
+                    print(f"FAIL {check.__name__} on {directory}: {e}")
+                else:
+                    print(f"ok   {check.__name__} on {directory}")
+    if failures:
+        sys.exit(f"{failures} checks failed.")
+
+
+def copy_dataset(directory, scratch, name):
+    path = os.path.join(scratch, name)
+    os.makedirs(path)
+    for filename in ("people.csv", "movies.csv", "stars.csv"):
+        shutil.copy(os.path.join(directory, filename), path)
+    return path
+
+
+def reset():
+    """
+    Forgets everything degrees has loaded, so each check starts clean.
+    """
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+    degrees.graph = None
+    degrees.landmarks = None
+    degrees.components = None
+
+
+def canonical(graph):
+    """
+    Returns the graph's people and movies keyed by IMDB id, with their
+    details and sorted co-star ids, so graphs numbered differently can
+    be compared.
+    """
+    people = {}
+    for p in range(graph.person_count()):
+        start, end = graph.person_offsets[p], graph.person_offsets[p + 1]
+        people[graph.person_ids[p]] = (
+            graph.person_names[p], graph.person_births[p],
+            tuple(sorted(graph.movie_ids[m] for m in graph.person_movies[start:end]))
+        )
+    movies = {}
+    for m in range(graph.movie_count()):
+        start, end = graph.movie_offsets[m], graph.movie_offsets[m + 1]
+        movies[graph.movie_ids[m]] = (
+            graph.movie_titles[m], graph.movie_years[m],
+            tuple(sorted(graph.person_ids[p] for p in graph.movie_people[start:end]))
+        )
+    for person_id in people:
+        assert graph.person_ids[graph.person_index(person_id)] == person_id
+    for movie_id in movies:
+        assert graph.movie_ids[graph.movie_index(movie_id)] == movie_id
+    years = graph.release_years
+    for p in range(graph.person_count()):
+        row = graph.person_movies[graph.person_offsets[p]:graph.person_offsets[p + 1]]
+        keys = [(years[m], m) for m in row]
+        assert keys == sorted(keys), "movies not in year order"
+    for m in range(graph.movie_count()):
+        assert years[m] == release_year(graph.movie_years[m]), "wrong year"
+    keys = [(years[m], m) for m in graph.year_order]
+    assert keys == sorted(keys), "year order is not sorted"
+    assert len(keys) == graph.movie_count(), "year order is incomplete"
+    names = [graph.person_names[p].lower() for p in graph.name_order]
+    assert names == sorted(names), "name order is not sorted"
+    assert len(names) == graph.person_count(), "name order is incomplete"
+    return people, movies
+
+
+def random_pairs(n, seed):
+    rng = random.Random(seed)
+    if degrees.graph is not None:
+        person_ids = list(degrees.graph.person_ids)
+    else:
+        person_ids = sorted(degrees.people)
+    return [tuple(rng.sample(person_ids, 2)) for _ in range(n)]
+
+
+def path_length(path):
+    return None if path is None else len(path)
+
+
+def check_path(source, target, path):
+    """
+    Asserts that `path` really leads from source to target.
+    """
+    person_id = source
+    for movie_id, next_id in path:
+        assert movie_id in degrees.people[person_id]["movies"], \
+            f"{person_id} is not in {movie_id}"
+        assert next_id in degrees.movies[movie_id]["stars"], \
+            f"{next_id} is not in {movie_id}"
+        person_id = next_id
+    assert person_id == target, f"path ends at {person_id}, not {target}"
+
+
+def check_backends(directory, queries, seed):
+    """
+    The dictionaries and the compact graph hold the same data, and
+    every search method finds valid paths of the same length on both.
+    """
+    reset()
+    degrees.load_data(directory)
+    dict_stats = degrees.component_stats()
+    pairs = random_pairs(queries, seed)
+    lengths = {}
+    for method in ("bfs", "bidirectional"):
+        for source, target in pairs:
+            path = degrees.shortest_path(source, target, method=method)
+            if path is not None:
+                check_path(source, target, path)
+            lengths.setdefault((source, target), set()).add(path_length(path))
+    expected = canonical(build_graph(degrees.people, degrees.movies))
+    dicts = (dict(degrees.people), dict(degrees.movies))
+
+    reset()
+    degrees.load_data(directory, compact=True)
+    assert canonical(degrees.graph) == expected, "compact graph differs"
+    assert degrees.component_stats() == dict_stats, "component stats differ"
+    for method in ("bfs", "bidirectional"):
+        for source, target in pairs:
+            path = degrees.shortest_path(source, target, method=method)
+            lengths[(source, target)].add(path_length(path))
+
+    # Paths found on the graph are checked against the dictionaries
+    degrees.people, degrees.movies = dicts
+    try:
+        for (source, target), found in lengths.items():
+            assert len(found) == 1, f"{source} -> {target}: {found}"
+            path = degrees.shortest_path(source, target, method="bidirectional")
+            if path is not None:
+                check_path(source, target, path)
+    finally:
+        degrees.people, degrees.movies = {}, {}
+
+
+def check_landmarks(directory, queries, seed):
+    """
+    Landmark bounds never exceed the true distance, and ALT finds paths
+    as short as breadth-first search.
+    """
+    reset()
+    degrees.load_data(directory, compact=True)
+    degrees.load_landmark_index(directory, 4, workers=1)
+    for source, target in random_pairs(queries, seed):
+        expected = path_length(degrees.shortest_path(source, target))
+        alt = path_length(degrees.shortest_path(source, target, method="alt"))
+        assert alt == expected, f"{source} -> {target}: alt {alt} != {expected}"
+        if expected is not None:
+            bound = degrees.distance_lower_bound(source, target)
+            assert bound <= expected, f"bound {bound} > distance {expected}"
+    os.remove(os.path.join(directory, "degrees.landmarks"))
+
+
+def check_paths(directory, queries, seed):
+    """
+    The shortest path DAG counts and lists the same paths, all of the
+    shortest length, and Yen's paths come out in order without repeats.
+    """
+    reset()
+    degrees.load_data(directory, compact=True)
+    graph = degrees.graph
+    for source, target in random_pairs(queries // 4, seed):
+        expected = path_length(degrees.shortest_path(source, target))
+        s, t = graph.person_index(source), graph.person_index(target)
+        dag = shortest_path_dag(graph, s, t)
+        assert dag.length() == expected
+        if expected is None:
+            continue
+        paths = []
+        for path in dag.paths():
+            assert len(path) == expected
+            paths.append(tuple(path))
+            if len(paths) > 1000:
+                break
+        else:
+            assert len(paths) == dag.count(), "count disagrees with paths"
+            assert len(set(paths)) == len(paths), "repeated shortest path"
+        found = list(yen_paths(graph, s, t, 10))
+        assert len(found[0]) == expected
+        assert [len(p) for p in found] == sorted(len(p) for p in found)
+        assert len(set(map(tuple, found))) == len(found), "repeated path"
+        for path in found:
+            people = [s] + [p for _, p in path]
+            assert len(set(people)) == len(people), "path revisits someone"
+
+
+def check_constraints(directory, queries, seed):
+    """
+    Searches limited to a range of years and avoiding some movies find
+    paths as short as a breadth-first search that filters every movie,
+    using only allowed movies, on both backends.
+    """
+    reset()
+    degrees.load_data(directory)
+    rng = random.Random(seed)
+    years = sorted(
+        int(movie["year"]) for movie in degrees.movies.values()
+        if movie["year"].isdigit()
+    )
+    first = years[len(years) // 4]
+    last = years[3 * len(years) // 4]
+    exclude = set(rng.sample(sorted(degrees.movies), len(degrees.movies) // 10))
+
+    def allowed(movie_id):
+        year = degrees.movies[movie_id]["year"]
+        return year.isdigit() and first <= int(year) <= last \
+            and movie_id not in exclude
+
+    def successors(person_id):
+        return [
+            (movie_id, person_id)
+            for movie_id in degrees.people[person_id]["movies"]
+            if allowed(movie_id)
+            for person_id in degrees.movies[movie_id]["stars"]
+        ]
+
+    pairs = random_pairs(queries // 4, seed)
+    expected = {}
+    for source, target in pairs:
+        node = breadth_first_search(source, target.__eq__, successors)
+        expected[source, target] = path_length(
+            None if node is None else node.path()
+        )
+    dicts = (dict(degrees.people), dict(degrees.movies))
+
+    for compact in (False, True):
+        reset()
+        degrees.load_data(directory, compact=compact)
+        paths = []
+        for method in ("bfs", "bidirectional"):
+            for source, target in pairs:
+                path = degrees.shortest_path(
+                    source, target, method=method,
+                    years=(first, last), exclude=exclude
+                )
+                found = path_length(path)
+                assert found == expected[source, target], \
+                    f"{source} -> {target}: {method} {found} != " \
+                    f"{expected[source, target]}"
+                if path is not None:
+                    paths.append((source, target, path))
+
+        # Paths are checked against the dictionaries
+        loaded = degrees.people, degrees.movies
+        degrees.people, degrees.movies = dicts
+        try:
+            for source, target, path in paths:
+                check_path(source, target, path)
+                assert all(allowed(m) for m, _ in path), \
+                    "path uses a disallowed movie"
+        finally:
+            degrees.people, degrees.movies = loaded
+
+    graph = degrees.graph
+    between = [graph.movie_ids[m] for m in graph.movies_between(first, last)]
+    assert sorted(between) == sorted(
+        movie_id for movie_id in dicts[1]
+        if dicts[1][movie_id]["year"].isdigit()
+        and first <= int(dicts[1][movie_id]["year"]) <= last
+    ), "movies_between disagrees with the years"
+
+
+def check_components(directory, queries, seed):
+    """
+    Components merged incrementally after additions, and relabelled
+    after removals, match labelling the updated graph from scratch.
+    """
+    rng = random.Random(seed)
+    for compact in (False, True):
+        reset()
+        degrees.load_data(directory, compact=compact)
+        person_ids = sorted(degrees.people) if not compact \
+            else list(degrees.graph.person_ids)
+        movie_ids = sorted(degrees.movies) if not compact \
+            else list(degrees.graph.movie_ids)
+        additions = Delta(
+            add_people=[("check-1", "Check Person", "2000")],
+            add_movies=[("check-2", "Check Movie", "2000")],
+            add_stars=[(rng.choice(person_ids), rng.choice(movie_ids))
+                       for _ in range(5)]
+            + [("check-1", "check-2"), (rng.choice(person_ids), "check-2")],
+        )
+        removals = Delta(remove_stars=additions.add_stars[:2])
+        for delta in (additions, removals):
+            degrees.apply_update(delta)
+            graph = degrees.compact_graph() if compact \
+                else build_graph(degrees.people, degrees.movies)
+            expected = label_graph(graph).stats()
+            assert degrees.component_stats() == expected, \
+                f"components differ after update (compact={compact})"
+
+
+def check_updates(directory, queries, seed):
+    """
+    Applying a delta in memory gives the same graph as loading CSVs
+    that already contain it, and writing it back keeps the CSVs, the
+    snapshot and the in-memory graph in agreement.
+    """
+    reset()
+    degrees.load_data(directory, compact=True)
+    graph = degrees.graph
+    person_ids = list(graph.person_ids)
+    movie_ids = list(graph.movie_ids)
+    rng = random.Random(seed)
+    # The first delta only adds, so it is spliced in; the second removes
+    # movies, so the graph is rebuilt
+    spliced = Delta(
+        add_people=[("check-3", "Other Person", "")],
+        add_movies=[("check-4", "Other Movie", "1990"),
+                    (movie_ids[1], "Redated Movie", "1850")],
+        add_stars=[("check-3", "check-4"), (person_ids[1], "check-4")]
+        + [(rng.choice(person_ids), movie_ids[1]) for _ in range(3)],
+    )
+    rebuilt = Delta(
+        add_people=[("check-1", "Check Person", "2000"),
+                    (person_ids[0], "Renamed Person", "1900")],
+        add_movies=[("check-2", "Check Movie", "2000")],
+        add_stars=[("check-1", "check-2"), (person_ids[0], "check-2")],
+        remove_stars=[(person_ids[-1], graph.movie_ids[m])
+                      for m in graph.person_movies[
+                          graph.person_offsets[-2]:graph.person_offsets[-1]]],
+        remove_movies=[rng.choice(movie_ids)],
+    )
+    copy = directory + "-updated"
+    shutil.copytree(directory, copy)
+    try:
+        for delta in (spliced, rebuilt):
+            degrees.apply_update(delta, copy)
+            updated = canonical(degrees.graph)
+            assert canonical(load_graph(copy)) == updated, \
+                "CSVs differ from graph"
+            snapshot = load_snapshot(copy)
+            assert snapshot is not None, "snapshot not current"
+            assert canonical(snapshot) == updated, "snapshot differs from graph"
+
+        reset()
+        degrees.load_data(copy)
+        expected = canonical(build_graph(degrees.people, degrees.movies))
+        assert expected == updated, "dictionaries differ from graph"
+    finally:
+        shutil.rmtree(copy)
+
+
+def check_snapshot(directory, queries, seed):
+    """
+    A snapshot round-trips the graph and its components, and is ignored
+    once the CSVs change.
+    """
+    graph = load_graph(directory)
+    graph.components = label_graph(graph)
+    save_snapshot(graph, directory)
+    loaded = load_snapshot(directory)
+    assert loaded is not None, "fresh snapshot not loaded"
+    assert canonical(loaded) == canonical(graph), "snapshot differs"
+    assert loaded.components.stats() == graph.components.stats()
+
+    stars = os.path.join(directory, "stars.csv")
+    with open(stars, "a", encoding="utf-8") as f:
+        f.write("")
+    os.utime(stars, ns=(0, os.stat(stars).st_mtime_ns + 1))
+    assert load_snapshot(directory) is None, "stale snapshot loaded"
+    os.remove(os.path.join(directory, "degrees.snapshot"))
+
+
+def check_search_toolkit(directory, queries, seed):
+    """
+    The generic drivers in util.py agree on shortest path lengths over
+    the co-star graph, and iterative deepening ends on unreachable goals.
+    """
+    reset()
+    degrees.load_data(directory)
+
+    def successors(person_id):
+        return degrees.neighbors_for_person(person_id)
+
+    for source, target in random_pairs(min(queries, 20), seed):
+        expected = path_length(degrees.shortest_path(source, target))
+        node = breadth_first_search(source, target.__eq__, successors)
+        assert path_length(None if node is None else node.path()) == expected
+        if expected is not None and expected <= 3:
+            node = iterative_deepening_search(source, target.__eq__, successors)
+            assert node.depth == expected, "iterative deepening too deep"
+
+    rng = random.Random(seed)
+    edges = {state: [] for state in range(60)}
+    for _ in range(120):
+        a, b = rng.randrange(59), rng.randrange(59)
+        edges[a].append((None, b))
+        edges[b].append((None, a))
+    # State 59 has no edges, so it can never be reached
+    assert iterative_deepening_search(0, (59).__eq__, edges.__getitem__) is None
+
+
+CHECKS = [
+    check_backends,
+    check_landmarks,
+    check_paths,
+    check_constraints,
+    check_components,
+    check_updates,
+    check_snapshot,
+    check_search_toolkit,
+]
+
+
+if __name__ == "__main__":
+    main()
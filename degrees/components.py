@@ -0,0 +1,159 @@
+from array import array
+
+
+class Components():
+    """
+    Connected components of the co-star graph.
+
+    labels[p] is the component of person p (a person number on the
+    compact graph, an IMDB id otherwise) and sizes[c] is the number of
+    people in component c. Components are numbered from largest to
+    smallest, so component 0 is the giant component.
+    """
+    def __init__(self, labels, sizes):
+        self.labels = labels
+        self.sizes = sizes
+
+    def count(self):
+        return len(self.sizes)
+
+    def component_of(self, p):
+        return self.labels[p]
+
+    def connected(self, a, b):
+        """
+        Returns True if there is any path between people `a` and `b`.
+        """
+        return self.labels[a] == self.labels[b]
+
+    def size_of(self, p):
+        return self.sizes[self.labels[p]]
+
+    def stats(self):
+        """
+        Returns a dictionary summarising the components: how many there
+        are, how many people they cover, the largest size and a histogram
+        mapping each component size to how many components have it.
+        """
+        histogram = {}
+        for size in self.sizes:
+            histogram[size] = histogram.get(size, 0) + 1
+        return {
+            "components": self.count(),
+            "people": sum(self.sizes),
+            "largest": self.sizes[0] if self.sizes else 0,
+            "isolated": histogram.get(1, 0),
+            "size_histogram": dict(sorted(histogram.items())),
+        }
+
+
+def label_graph(graph):
+    """
+    Labels the components of a compact Graph with union-find, joining
+    every movie's cast together.
+    """
+    movie_offsets = graph.movie_offsets
+    casts = (
+        graph.movie_people[movie_offsets[m]:movie_offsets[m + 1]]
+        for m in range(graph.movie_count())
+    )
+    labels, sizes = _union_find(graph.person_count(), casts)
+    return Components(labels, sizes)
+
+
+def label_dicts(people, movies):
+    """
+    Labels the components of the people/movies dictionaries that
+    degrees.load_data fills in.
+    """
+    numbers = {person_id: i for i, person_id in enumerate(people)}
+    casts = (
+        [numbers[person_id] for person_id in movie["stars"]]
+        for movie in movies.values()
+    )
+    labels, sizes = _union_find(len(numbers), casts)
+    return Components(dict(zip(numbers, labels)), sizes)
+
+
+def _union_find(count, groups):
+    """
+    Joins the members of each group of numbers in 0..count-1, returning
+    a component label for every number and the size of each component,
+    with components numbered from largest to smallest.
+    """
+    parents = array("i", range(count))
+
+    def find(x):
+        root = x
+        while parents[root] != root:
+            root = parents[root]
+        while parents[x] != root:
+            parents[x], x = root, parents[x]
+        return root
+
+    for group in groups:
+        if len(group) < 2:
+            continue
+        root = find(group[0])
+        for member in group[1:]:
+            other = find(member)
+            if other != root:
+                parents[other] = root
+
+    return _renumber(array("i", (find(x) for x in range(count))))
+
+
+def merge_components(components, old_labels, groups):
+    """
+    Updates component labels after people and star links were added
+    (but nothing removed), without relabelling from scratch.
+
+    `old_labels` gives each person's label in `components`, or -1 for new
+    people, and `groups` are lists of people (indexes into `old_labels`)
+    now joined together, such as the casts of movies that gained stars.
+    Only the components themselves go through union-find. Returns the
+    new labels and sizes, numbered from largest to smallest.
+    """
+    labels = array("i", old_labels)
+    fresh = components.count()
+    for p in range(len(labels)):
+        if labels[p] < 0:
+            labels[p] = fresh
+            fresh += 1
+
+    parents = array("i", range(fresh))
+
+    def find(x):
+        root = x
+        while parents[root] != root:
+            root = parents[root]
+        while parents[x] != root:
+            parents[x], x = root, parents[x]
+        return root
+
+    for group in groups:
+        if len(group) < 2:
+            continue
+        root = find(labels[group[0]])
+        for member in group[1:]:
+            other = find(labels[member])
+            if other != root:
+                parents[other] = root
+
+    return _renumber(array("i", (find(label) for label in labels)))
+
+
+def _renumber(roots):
+    """
+    Given the root of every member, returns a component label for every
+    member and the size of each component, with components numbered from
+    largest to smallest.
+    """
+    sizes = {}
+    for root in roots:
+        sizes[root] = sizes.get(root, 0) + 1
+    order = sorted(sizes, key=lambda root: (-sizes[root], root))
+    renumber = {root: c for c, root in enumerate(order)}
+
+    labels = array("i", (renumber[root] for root in roots))
+    return labels, array("i", (sizes[root] for root in order))
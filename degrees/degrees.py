@@ -1,7 +1,21 @@
+import argparse
 import csv
+import os
 import sys
-
-from util import Node, StackFrontier, QueueFrontier
+import time
+from array import array
+
+from components import Components, label_dicts, label_graph, merge_components
+from distances import single_source
+from graph import MovieFilter, build_graph, update_graph
+from ingest import IngestStats, load_graph
+from landmarks import (
+    alt_path, build_landmarks, landmarks_path, load_landmarks, save_landmarks
+)
+from paths import shortest_path_dag, yen_paths
+from snapshot import load_snapshot, save_snapshot
+from updates import read_delta, update_dicts, write_delta
+from util import SearchStats, breadth_first_search
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,15 +26,60 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed Graph (see graph.py) used instead of the
+# dictionaries above when data is loaded with compact=True
+graph = None
+
+# LandmarkIndex (see landmarks.py) for the graph above, if one is loaded
+landmarks = None
+
+# Components (see components.py) of whichever form the data is loaded in
+components = None
+
 
-def load_data(directory):
+def load_data(directory, compact=False, cache=False, workers=None,
+              stats=None):
     """
     Load data from CSV files into memory.
+
+    With `compact`, the data is loaded into a Graph instead of the
+    names/people/movies dictionaries, which takes far less memory, and
+    large CSVs are parsed in chunks by `workers` processes (default: one
+    per CPU; see ingest.py). If `stats` is an IngestStats, the rows read
+    from each CSV and the time taken are recorded in it.
+
+    With `cache`, a snapshot written by build_cache is memory-mapped
+    instead if it is still up to date with the CSVs. Returns True if
+    the snapshot was used.
+
+    Connected components are labelled as part of loading (or read from
+    the snapshot), so unconnected people can be spotted without a search.
     """
+    global graph, landmarks, components
+    landmarks = None
+    if cache:
+        graph = load_snapshot(directory)
+        if graph is not None:
+            if graph.components is None:
+                graph.components = label_graph(graph)
+            components = graph.components
+            return True
+    if compact:
+        graph = load_graph(directory, workers, stats)
+        graph.components = label_graph(graph)
+        components = graph.components
+        return False
+    graph = None
+    if stats is None:
+        stats = IngestStats()
+
     # Load people
+    start = time.perf_counter()
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
+        rows = 0
         for row in reader:
+            rows += 1
             people[row["id"]] = {
                 "name": row["name"],
                 "birth": row["birth"],
@@ -30,37 +89,350 @@ def load_data(directory):
                 names[row["name"].lower()] = {row["id"]}
             else:
                 names[row["name"].lower()].add(row["id"])
+    stats.record("people.csv", rows, time.perf_counter() - start, 1)
 
     # Load movies
+    start = time.perf_counter()
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
+        rows = 0
         for row in reader:
+            rows += 1
             movies[row["id"]] = {
                 "title": row["title"],
                 "year": row["year"],
                 "stars": set()
             }
+    stats.record("movies.csv", rows, time.perf_counter() - start, 1)
 
     # Load stars
+    start = time.perf_counter()
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
+        rows = 0
         for row in reader:
+            rows += 1
             try:
                 people[row["person_id"]]["movies"].add(row["movie_id"])
                 movies[row["movie_id"]]["stars"].add(row["person_id"])
             except KeyError:
                 pass
+    stats.record("stars.csv", rows, time.perf_counter() - start, 1)
+
+    components = label_dicts(people, movies)
+    return False
+
+
+def load_landmark_index(directory, k, workers=None):
+    """
+    Loads the landmark index saved in `directory`, or builds one with `k`
+    landmarks (in parallel over `workers` processes) and saves it.
+
+    Data loaded into the dictionaries is converted to a Graph first,
+    since landmark searches run on the compact form.
+    """
+    global landmarks
+    compact_graph()
+    landmarks = load_landmarks(directory, graph.person_count())
+    if landmarks is None or len(landmarks.landmarks) != k:
+        landmarks = build_landmarks(graph, k, workers)
+        save_landmarks(landmarks, directory)
+    return landmarks
+
+
+def compact_graph():
+    """
+    Returns the loaded data as a Graph, converting the dictionaries
+    to one (and using it from then on) if they were loaded instead.
+    """
+    global graph, components
+    if graph is None:
+        graph = build_graph(people, movies)
+        graph.components = label_graph(graph)
+        components = graph.components
+    return graph
+
+
+def distances_from(person_id, parents=False):
+    """
+    Returns the degrees of separation from one person to everyone else
+    as a Distances (see distances.py) indexed by person number on
+    compact_graph(), from a single breadth-first search.
+
+    With `parents`, the path to anyone can then be rebuilt with
+    path_from(distances, person_id) without searching again.
+    """
+    g = compact_graph()
+    return single_source(g, g.person_index(person_id), parents)
+
+
+def count_shortest_paths(source, target):
+    """
+    Returns how many different shortest paths connect two people, where
+    paths through different movies count separately, without listing them.
+    """
+    if not connected(source, target):
+        return 0
+    return _dag(source, target).count()
+
+
+def all_shortest_paths(source, target):
+    """
+    Lazily yields every shortest path between two people, each in the
+    same form as shortest_path. Paths are generated one at a time from a
+    single search, so memory stays bounded however many there are.
+    """
+    if not connected(source, target):
+        return
+    for path in _dag(source, target).paths():
+        yield [(graph.movie_ids[m], graph.person_ids[p]) for m, p in path]
+
+
+def k_shortest_paths(source, target, k=None):
+    """
+    Lazily yields up to `k` paths between two people that never visit
+    anyone twice, shortest first, each in the same form as shortest_path.
+    """
+    if not connected(source, target):
+        return
+    g = compact_graph()
+    paths = yen_paths(
+        g, g.person_index(source), g.person_index(target), k
+    )
+    for path in paths:
+        yield [(g.movie_ids[m], g.person_ids[p]) for m, p in path]
+
+
+def _dag(source, target):
+    g = compact_graph()
+    return shortest_path_dag(
+        g, g.person_index(source), g.person_index(target)
+    )
+
+
+def path_from(distances, person_id):
+    """
+    Returns the (movie_id, person_id) path from the source of
+    `distances` to a person, in the same form as shortest_path.
+    """
+    path = distances.path_to(graph.person_index(person_id))
+    if path is None:
+        return None
+    return [(graph.movie_ids[m], graph.person_ids[p]) for m, p in path]
+
+
+def distance_lower_bound(source, target):
+    """
+    Returns a lower bound on the degrees of separation between two
+    people from the loaded landmark index, without searching, or None
+    if the landmarks show they are not connected.
+    """
+    if landmarks is None:
+        raise RuntimeError("no landmark index loaded")
+    return landmarks.lower_bound(
+        graph.person_index(source), graph.person_index(target)
+    )
+
+
+def build_cache(directory):
+    """
+    Load the CSVs in `directory` and write a snapshot of them that
+    later calls to load_data(directory, cache=True) can map directly.
+    Returns the path of the snapshot.
+    """
+    global graph, components
+    graph = load_graph(directory)
+    graph.components = label_graph(graph)
+    components = graph.components
+    return save_snapshot(graph, directory)
+
+
+def apply_update(delta, directory=None):
+    """
+    Applies a Delta (see updates.py) to whichever form the data is
+    loaded in, along with the name index and component labels, without
+    reloading the CSVs.
+
+    Components are merged incrementally when the delta only adds things;
+    removals can split components, so those relabel from scratch. The
+    landmark index cannot be patched and is dropped.
+
+    If `directory` is given, the delta is also written into its CSVs and
+    the result saved as its snapshot, stamped with the updated CSVs. So
+    --no-cache and --build-cache see the same data as the snapshot, and
+    a landmark index built before the update no longer matches.
+    """
+    global graph, components, landmarks
+    landmarks = None
+    if directory is not None:
+        replaced_people = {
+            row[0] for row in delta.add_people if person_exists(row[0])
+        }
+        replaced_movies = {
+            row[0] for row in delta.add_movies if movie_exists(row[0])
+        }
+    merge = components is not None and not delta.removes()
+
+    if graph is None:
+        update_dicts(names, people, movies, delta)
+        if merge:
+            numbers = {person_id: i for i, person_id in enumerate(people)}
+            old_labels = array("i", (
+                components.labels.get(person_id, -1) for person_id in people
+            ))
+            groups = (
+                [numbers[person_id] for person_id in movies[movie_id]["stars"]]
+                for movie_id in delta.touched_movies() if movie_id in movies
+            )
+            labels, sizes = merge_components(components, old_labels, groups)
+            components = Components(dict(zip(numbers, labels)), sizes)
+        else:
+            components = label_dicts(people, movies)
+    else:
+        old_graph = graph
+        graph, person_map = update_graph(old_graph, delta)
+        if merge:
+            if person_map is None:
+                # Everyone kept their number; new people come after
+                old_labels = array("i", components.labels)
+                old_labels.extend(
+                    [-1] * (graph.person_count() - len(old_labels))
+                )
+            else:
+                old_labels = array("i", [-1]) * graph.person_count()
+                for p in range(old_graph.person_count()):
+                    if person_map[p] >= 0:
+                        old_labels[person_map[p]] = components.labels[p]
+            offsets = graph.movie_offsets
+            groups = []
+            for movie_id in delta.touched_movies():
+                m = graph.movie_index(movie_id)
+                if m is not None:
+                    groups.append(graph.movie_people[offsets[m]:offsets[m + 1]])
+            labels, sizes = merge_components(components, old_labels, groups)
+            graph.components = Components(labels, sizes)
+        else:
+            graph.components = label_graph(graph)
+        components = graph.components
+
+    if directory is not None:
+        write_delta(directory, delta, replaced_people, replaced_movies)
+        save_update(directory)
+
+
+def save_update(directory):
+    """
+    Saves the loaded data as the snapshot for `directory`, whose CSVs
+    must already hold the same data, and removes the landmark index
+    saved there, whose distances may now be wrong.
+    Returns the path of the snapshot.
+    """
+    if graph is None:
+        snapshot = build_graph(people, movies)
+        snapshot.components = label_graph(snapshot)
+    else:
+        snapshot = graph
+    try:
+        os.remove(landmarks_path(directory))
+    except FileNotFoundError:
+        pass
+    return save_snapshot(snapshot, directory)
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find the degrees of separation between two people."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "--bidirectional", action="store_true",
+        help="search from both people at once instead of only the source"
+    )
+    parser.add_argument(
+        "--compact", action="store_true",
+        help="load data into the compact integer-indexed graph"
+    )
+    parser.add_argument(
+        "--build-cache", action="store_true",
+        help="write a snapshot of the data next to the CSVs and exit"
+    )
+    parser.add_argument(
+        "--apply", metavar="DELTA",
+        help="apply the additions and removals in the CSVs in directory "
+             "DELTA, save the result as the snapshot and exit"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="always parse the CSVs, even if a snapshot is up to date"
+    )
+    parser.add_argument(
+        "--landmarks", type=int, metavar="K",
+        help="load an index of K landmarks, building and saving it on "
+             "first use, and report a lower bound before searching"
+    )
+    parser.add_argument(
+        "--alt", action="store_true",
+        help="search with A* guided by the landmarks (needs --landmarks); "
+             "on small-world co-star graphs this is usually slower than "
+             "--bidirectional"
+    )
+    parser.add_argument(
+        "--years", type=year_range, metavar="FIRST-LAST",
+        help="only connect people through movies released in these years; "
+             "either end may be left out, as in 1990- or -2000"
+    )
+    parser.add_argument(
+        "--exclude-movie", action="append", metavar="ID", default=[],
+        help="never connect people through the movie with this IMDB id "
+             "(may be repeated)"
+    )
+    parser.add_argument(
+        "--paths", type=int, metavar="K",
+        help="count the shortest paths and list up to K paths that never "
+             "visit anyone twice, shortest first"
+    )
+    parser.add_argument(
+        "--workers", type=int, metavar="N",
+        help="processes parsing the CSVs for --compact "
+             "(default: one per CPU)"
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="report how fast the data loaded and how much work the "
+             "search did"
+    )
+    args = parser.parse_args()
+    directory = args.directory
+    if args.alt and not args.landmarks:
+        parser.error("--alt needs --landmarks")
+    if args.alt and (args.years or args.exclude_movie):
+        parser.error("--alt cannot be combined with constraints")
+
+    if args.build_cache:
+        print("Building cache...")
+        path = build_cache(directory)
+        print(f"Cache written to {path}.")
+        return
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    load_stats = IngestStats()
+    if load_data(directory, compact=args.compact, cache=not args.no_cache,
+                 workers=args.workers, stats=load_stats):
+        print("Data loaded from cache.")
+    else:
+        print("Data loaded.")
+        if args.stats:
+            print(f"Load: {load_stats}")
+    if args.apply:
+        print("Applying update...")
+        apply_update(read_delta(args.apply), directory)
+        print(f"Update saved to {directory}.")
+        return
+    if args.landmarks:
+        print("Loading landmarks...")
+        load_landmark_index(directory, args.landmarks)
+        print("Landmarks loaded.")
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,7 +441,25 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.paths:
+        print_paths(source, target, args.paths)
+        return
+
+    if args.landmarks and connected(source, target):
+        bound = distance_lower_bound(source, target)
+        print(f"At least {bound} degrees of separation.")
+
+    if args.alt:
+        method = "alt"
+    elif args.bidirectional:
+        method = "bidirectional"
+    else:
+        method = "bfs"
+    stats = SearchStats()
+    path = shortest_path(
+        source, target, method=method, stats=stats,
+        years=args.years, exclude=args.exclude_movie
+    )
 
     if path is None:
         print("Not connected.")
@@ -78,73 +468,245 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = get_person(path[i][1])["name"]
+            person2 = get_person(path[i + 1][1])["name"]
+            movie = get_movie(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+    if args.stats:
+        print(f"Search: {stats}")
+
+
+def year_range(text):
+    """
+    Parses a FIRST-LAST range of years for --years into a (first, last)
+    pair, with None for an end left out.
+    """
+    first, sep, last = text.partition("-")
+    try:
+        if not sep:
+            raise ValueError
+        return (int(first) if first else None, int(last) if last else None)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a range of years: {text}")
 
 
-def shortest_path(source, target):
+def print_paths(source, target, k):
+    """
+    Prints the number of shortest paths between two people and up to
+    `k` loop-free paths between them.
+    """
+    count = count_shortest_paths(source, target)
+    if count == 0:
+        print("Not connected.")
+        return
+    print(f"{count} shortest path{'' if count == 1 else 's'}.")
+    for n, path in enumerate(k_shortest_paths(source, target, k), 1):
+        steps = [get_person(source)["name"]]
+        for movie_id, person_id in path:
+            steps.append(f"({get_movie(movie_id)['title']})")
+            steps.append(get_person(person_id)["name"])
+        print(f"{n}: {len(path)} degrees: {' '.join(steps)}")
+
+
+def shortest_path(source, target, method="bfs", stats=None,
+                  years=None, exclude=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    `method` is "bfs" to search outwards from the source only,
+    "bidirectional" to grow a frontier from each end, or "alt" for A*
+    guided by the loaded landmark index. If `stats` is a SearchStats,
+    the people expanded, peak frontier size and time taken are added
+    to it.
+
+    `years` is a (first, last) pair of release years, either of which
+    may be None, and `exclude` a collection of movie_ids; when given,
+    the path only goes through movies released in those years and not
+    excluded. Constrained searches run on compact_graph(), whose
+    movies-by-year index lets them skip disallowed movies unexpanded.
+
+    People in different components are reported as unconnected
+    straight away, without searching.
     """
+    if not connected(source, target):
+        return None
+    if stats is None:
+        stats = SearchStats()
+    if years is not None or exclude:
+        movie_filter = movie_filter_for(years, exclude)
+        with stats.timer():
+            return compact_path(source, target, method, stats, movie_filter)
+    if graph is not None:
+        with stats.timer():
+            return compact_path(source, target, method, stats)
+
+    if method == "bidirectional":
+        with stats.timer():
+            return bidirectional_path(source, target, stats)
+    elif method != "bfs":
+        raise ValueError(f"unknown search method: {method}")
+
+    node = breadth_first_search(
+        source, lambda person_id: person_id == target,
+        neighbors_for_person, stats
+    )
+    if node is None:
+        return None
+    return node.path()
+
 
-    #init frontier to starting position
-    start = Node(state = (None, source), parent = None, action = None)
-    frontier = QueueFrontier()
-    frontier.add(start)
+def connected(source, target):
+    """
+    Returns True if there is any path between two people, using the
+    component labels computed when the data was loaded.
+    """
+    if components is None:
+        return True
+    if graph is not None:
+        source = graph.person_index(source)
+        target = graph.person_index(target)
+    return components.connected(source, target)
 
-    #init empty explored list
-    explored = set()
 
-    #set the solution node
-    solution = None
+def component_stats():
+    """
+    Returns a summary of the connected components of the loaded data
+    (see Components.stats), or None if nothing is loaded.
+    """
+    if components is None:
+        return None
+    return components.stats()
 
-    while solution == None:
-        #no solution if frontier is empty
-        if frontier.empty():
-            break
 
-        #use breadth first search
-        #get node from frontier and add to explored
-        node = frontier.remove()
-        explored.add(node.state[1])
-        
-        #get all of the neighbors for this person
-        neighbors = neighbors_for_person(node.state[1])
+def movie_filter_for(years=None, exclude=None):
+    """
+    Returns a MovieFilter on compact_graph() for shortest_path's `years`
+    and `exclude` constraints. Unknown movie_ids are ignored.
+    """
+    g = compact_graph()
+    first, last = years if years is not None else (None, None)
+    excluded = (g.movie_index(movie_id) for movie_id in exclude or ())
+    return MovieFilter(first, last, (m for m in excluded if m is not None))
 
-        for neighbor in neighbors:
-            #create new node for that neighbor and set the parent to the current node
-            new_node = Node(state = neighbor, parent = node, action = None)
 
-            #set the solution if found
-            if neighbor[1] == target:
-                solution = new_node
+def compact_path(source, target, method="bfs", stats=None, movie_filter=None):
+    """
+    shortest_path on the compact graph: translates the IMDB ids to
+    person numbers, searches, and translates the path back.
+    """
+    if method == "alt":
+        if movie_filter is not None:
+            raise ValueError("alt search does not take constraints")
+        if landmarks is None:
+            raise RuntimeError("no landmark index loaded")
+        path = alt_path(
+            graph, landmarks,
+            graph.person_index(source), graph.person_index(target), stats
+        )
+        if path is None:
+            return None
+        return [(graph.movie_ids[m], graph.person_ids[p]) for m, p in path]
+    elif method == "bidirectional":
+        search = graph.bidirectional_path
+    elif method == "bfs":
+        search = graph.shortest_path
+    else:
+        raise ValueError(f"unknown search method: {method}")
 
-            else:
-                #figure out if it has been explored
-                is_explored = False
-
-                for explored_id in explored:
-                    if explored_id == neighbor[1]:
-                        is_explored = True
-                
-                #add to frontier if not explored yet
-                if not is_explored:
-                    frontier.add(new_node)
-    
-
-    if solution == None:
+    path = search(
+        graph.person_index(source), graph.person_index(target), stats,
+        movie_filter
+    )
+    if path is None:
         return None
-    else:
-        final_solution = []
-        while not solution.state[1] == start.state[1]:
-            final_solution.insert(0, solution.state)
-            solution = solution.parent
-        return final_solution
+    return [(graph.movie_ids[m], graph.person_ids[p]) for m, p in path]
+
+
+def bidirectional_path(source, target, stats=None):
+    """
+    Bidirectional breadth-first search between source and target.
+
+    Keeps one frontier growing out of the source and one growing out of
+    the target, and always expands a whole level of whichever frontier
+    is smaller. The search stops as soon as the two sides meet, which
+    on hub-heavy graphs visits far fewer people than a one-sided search.
+
+    Returns the same list of (movie_id, person_id) pairs as shortest_path.
+    """
+    if source == target:
+        return []
+
+    # Maps each reached person to the (movie_id, person_id) edge that
+    # leads back towards the side's own root
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    meeting = None
+    while forward_frontier and backward_frontier and meeting is None:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = _expand_level(
+                forward_frontier, forward, backward, len(backward_frontier),
+                stats
+            )
+        else:
+            backward_frontier, meeting = _expand_level(
+                backward_frontier, backward, forward, len(forward_frontier),
+                stats
+            )
+
+    if meeting is None:
+        return None
+
+    # Walk from the meeting point back to the source...
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent_id = forward[person_id]
+        path.insert(0, (movie_id, person_id))
+        person_id = parent_id
+
+    # ...then on from the meeting point to the target
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, next_id = backward[person_id]
+        path.append((movie_id, next_id))
+        person_id = next_id
+
+    return path
+
+
+def _expand_level(frontier, parents, other_parents, other_size, stats):
+    """
+    Expands every person in `frontier` by one step, recording new people
+    in `parents`. Returns the next frontier and the first person also
+    reached from the other side (or None if the sides have not met).
+    The frontier size recorded after each person counts everyone still
+    to be expanded on both sides, the other side's being `other_size`.
+
+    Because both searches grow one level at a time, the first meeting
+    found always lies on a shortest path.
+    """
+    next_frontier = []
+    for k, person_id in enumerate(frontier):
+        if stats is not None:
+            stats.expanded += 1
+        for movie_id, neighbor_id in neighbors_for_person(person_id):
+            if neighbor_id in parents:
+                continue
+            parents[neighbor_id] = (movie_id, person_id)
+            if neighbor_id in other_parents:
+                return next_frontier, neighbor_id
+            next_frontier.append(neighbor_id)
+        if stats is not None:
+            stats.frontier_size(
+                len(frontier) - k - 1 + len(next_frontier) + other_size
+            )
+    return next_frontier, None
 
 
 def person_id_for_name(name):
@@ -152,13 +714,13 @@ def person_id_for_name(name):
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = people_for_name(name)
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = get_person(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -173,11 +735,65 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def people_for_name(name):
+    """
+    Returns a list of the IMDB ids of everyone with the given name.
+    """
+    if graph is not None:
+        return [graph.person_ids[p] for p in graph.people_named(name)]
+    return list(names.get(name.lower(), set()))
+
+
+def person_exists(person_id):
+    """
+    Returns True if `person_id` is the IMDB id of a loaded person.
+    """
+    if graph is not None:
+        return graph.person_index(person_id) is not None
+    return person_id in people
+
+
+def movie_exists(movie_id):
+    """
+    Returns True if `movie_id` is the IMDB id of a loaded movie.
+    """
+    if graph is not None:
+        return graph.movie_index(movie_id) is not None
+    return movie_id in movies
+
+
+def get_person(person_id):
+    """
+    Returns a dictionary with at least the name and birth of a person.
+    """
+    if graph is not None:
+        return graph.person(graph.person_index(person_id))
+    return people[person_id]
+
+
+def get_movie(movie_id):
+    """
+    Returns a dictionary with at least the title and year of a movie.
+    """
+    if graph is not None:
+        return graph.movie(graph.movie_index(movie_id))
+    return movies[movie_id]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
+
+    On the compact graph the pairs are generated lazily from the
+    adjacency arrays rather than collected into a set.
     """
+    if graph is not None:
+        return (
+            (graph.movie_ids[m], graph.person_ids[p])
+            for m, p in graph.neighbors(graph.person_index(person_id))
+        )
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
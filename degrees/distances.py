@@ -0,0 +1,101 @@
+from array import array
+
+from landmarks import FARTHEST, UNREACHABLE
+
+
+class Distances():
+    """
+    Degrees of separation from one person to everyone, found with a
+    single breadth-first search of a compact Graph.
+
+    distances[p] is the distance to person p, one byte per person, with
+    UNREACHABLE for people in other components. histogram[d] is how many
+    people are at distance d. If parent pointers were kept, person p was
+    reached through movie parent_movies[p] from person parent_people[p]
+    (both -1 for the source and anyone unreached).
+    """
+    def __init__(self, source, distances, histogram,
+                 parent_movies=None, parent_people=None):
+        self.source = source
+        self.distances = distances
+        self.histogram = histogram
+        self.parent_movies = parent_movies
+        self.parent_people = parent_people
+
+    def distance(self, p):
+        """
+        Returns the distance to person `p`, or None if they cannot be
+        reached.
+        """
+        d = self.distances[p]
+        return None if d == UNREACHABLE else d
+
+    def reached(self):
+        return sum(self.histogram)
+
+    def path_to(self, p):
+        """
+        Returns the (movie, person) number pairs leading from the source
+        to person `p`, or None if `p` cannot be reached.
+        """
+        if self.parent_people is None:
+            raise RuntimeError("distances were computed without parents")
+        if self.distances[p] == UNREACHABLE:
+            return None
+        path = []
+        while p != self.source:
+            path.append((self.parent_movies[p], p))
+            p = self.parent_people[p]
+        path.reverse()
+        return path
+
+
+def single_source(graph, source, parents=False):
+    """
+    Breadth-first search from person `source` to every person in `graph`,
+    returning a Distances. With `parents`, the movie and person each
+    person was first reached through are kept as well, so paths can be
+    rebuilt later without searching again.
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+
+    distances = bytearray([UNREACHABLE]) * graph.person_count()
+    seen_movies = bytearray(graph.movie_count())
+    if parents:
+        parent_movies = array("i", [-1]) * graph.person_count()
+        parent_people = array("i", [-1]) * graph.person_count()
+    else:
+        parent_movies = parent_people = None
+
+    distances[source] = 0
+    histogram = [1]
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth = min(depth + 1, FARTHEST)
+        next_frontier = []
+        for p in frontier:
+            for i in range(person_offsets[p], person_offsets[p + 1]):
+                m = person_movies[i]
+                if seen_movies[m]:
+                    continue
+                seen_movies[m] = 1
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    q = movie_people[j]
+                    if distances[q] != UNREACHABLE:
+                        continue
+                    distances[q] = depth
+                    if parents:
+                        parent_movies[q] = m
+                        parent_people[q] = p
+                    next_frontier.append(q)
+        if next_frontier:
+            if depth == len(histogram):
+                histogram.append(0)
+            histogram[depth] += len(next_frontier)
+        frontier = next_frontier
+
+    return Distances(source, distances, histogram, parent_movies, parent_people)
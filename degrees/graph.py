@@ -0,0 +1,837 @@
+import csv
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class StringTable():
+    """
+    Read-only sequence of strings packed into one UTF-8 buffer.
+
+    String i is data[offsets[i]:offsets[i + 1]]. This costs a few bytes
+    per string instead of a full Python object each.
+    """
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        data = bytearray()
+        offsets = array("q", [0])
+        for string in strings:
+            data += string.encode("utf-8")
+            offsets.append(len(data))
+        return cls(bytes(data), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def updated(self, replace=None, append=()):
+        """
+        Returns a new StringTable with the strings at the indexes in
+        `replace` swapped for new ones and the strings in `append` added
+        at the end. Runs of unchanged strings are copied as whole slices.
+        """
+        data = bytearray()
+        offsets = array("q", [0])
+        position = 0
+        for i in sorted(replace or ()):
+            _copy_strings(self, position, i, data, offsets)
+            data += replace[i].encode("utf-8")
+            offsets.append(len(data))
+            position = i + 1
+        _copy_strings(self, position, len(self), data, offsets)
+        for string in append:
+            data += string.encode("utf-8")
+            offsets.append(len(data))
+        return StringTable(bytes(data), offsets)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+def _copy_strings(table, start, stop, data, offsets):
+    """
+    Appends strings start..stop-1 of `table` to `data` and `offsets`.
+    """
+    if stop <= start:
+        return
+    first = table.offsets[start]
+    shift = len(data) - first
+    data += table.data[first:table.offsets[stop]]
+    offsets.extend(map(shift.__add__, table.offsets[start + 1:stop + 1]))
+
+
+class Graph():
+    """
+    Compact, integer-indexed form of the people/movies data.
+
+    People and movies are numbered 0..n-1 in order of their IMDB ids,
+    except that people and movies added by update_graph are numbered
+    after the existing ones. Then `person_order` and `movie_order` list
+    the numbers sorted by IMDB id; they are None while numbers and ids
+    are in the same order. Who starred in what is kept as two CSR
+    (compressed sparse row) adjacency lists of ints:
+
+        movies of person p:  person_movies[person_offsets[p]:person_offsets[p + 1]]
+        stars of movie m:    movie_people[movie_offsets[m]:movie_offsets[m + 1]]
+
+    Each person's movies are ordered by release year (then number), and
+    `release_years[m]` is movie m's year as an int, 0 if unknown, so the
+    movies of a person from a range of years can be found by binary
+    search. `year_order` lists every movie number sorted the same way.
+
+    `name_order` lists person numbers sorted by lowercased name so that
+    names can be looked up by binary search. `components` holds the
+    graph's connected components (see components.py) once labelled.
+    """
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies,
+                 movie_offsets, movie_people, name_order,
+                 release_years, year_order,
+                 person_order=None, movie_order=None, components=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        self.name_order = name_order
+        self.release_years = release_years
+        self.year_order = year_order
+        self.person_order = person_order
+        self.movie_order = movie_order
+        self.components = components
+
+    def person_count(self):
+        return len(self.person_ids)
+
+    def movie_count(self):
+        return len(self.movie_ids)
+
+    def person_index(self, person_id):
+        """
+        Returns the number of the person with the given IMDB id,
+        or None if there is no such person.
+        """
+        return _index(self.person_ids, person_id, self.person_order)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the number of the movie with the given IMDB id,
+        or None if there is no such movie.
+        """
+        return _index(self.movie_ids, movie_id, self.movie_order)
+
+    def people_named(self, name):
+        """
+        Returns the numbers of every person whose name matches `name`,
+        ignoring case.
+        """
+        name = name.lower()
+        key = self._name_key
+        i = bisect_left(self.name_order, name, key=key)
+        matches = []
+        while i < len(self.name_order) and key(self.name_order[i]) == name:
+            matches.append(self.name_order[i])
+            i += 1
+        return matches
+
+    def _name_key(self, p):
+        return self.person_names[p].lower()
+
+    def movies_between(self, first=None, last=None):
+        """
+        Returns the numbers of movies released from year `first` to year
+        `last` inclusive (either may be None for no limit), in year order.
+        Movies with no known year are never included.
+        """
+        first, last = _year_bounds(first, last)
+        key = self.release_years.__getitem__
+        start = bisect_left(self.year_order, first, key=key)
+        end = bisect_right(self.year_order, last, key=key)
+        return self.year_order[start:end]
+
+    def movie_range(self, p, movie_filter=None):
+        """
+        Returns the start and end of the slice of person_movies holding
+        the movies of person `p` that `movie_filter` allows by year.
+        Excluded movies still have to be checked one by one.
+        """
+        start = self.person_offsets[p]
+        end = self.person_offsets[p + 1]
+        if movie_filter is None or not movie_filter.by_year():
+            return start, end
+        first, last = _year_bounds(
+            movie_filter.first_year, movie_filter.last_year
+        )
+        key = self.release_years.__getitem__
+        start = bisect_left(self.person_movies, first, start, end, key=key)
+        end = bisect_right(self.person_movies, last, start, end, key=key)
+        return start, end
+
+    def person(self, p):
+        """
+        Returns a dictionary of name and birth for person number `p`.
+        """
+        return {"name": self.person_names[p], "birth": self.person_births[p]}
+
+    def movie(self, m):
+        """
+        Returns a dictionary of title and year for movie number `m`.
+        """
+        return {"title": self.movie_titles[m], "year": self.movie_years[m]}
+
+    def neighbors(self, p):
+        """
+        Yields (movie, person) number pairs for people who starred with
+        person `p`, read straight from the adjacency arrays.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        for i in range(person_offsets[p], person_offsets[p + 1]):
+            m = person_movies[i]
+            for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                yield m, movie_people[j]
+
+    def shortest_path(self, source, target, stats=None, movie_filter=None):
+        """
+        Breadth-first search from person `source` to person `target`.
+
+        Returns a list of (movie, person) number pairs, or None if the two
+        are not connected. A movie's cast is only ever scanned once, from
+        the first (and therefore closest) person to reach it. With a
+        MovieFilter, only the movies it allows are followed: disallowed
+        years are cut off each person's row by binary search and excluded
+        movies are treated as already seen, so neither is ever expanded.
+        """
+        if source == target:
+            return []
+
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        movie_range = self.movie_range
+
+        parents = {source: None}
+        seen_movies = set(movie_filter.excluded if movie_filter else ())
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for k, p in enumerate(frontier):
+                if stats is not None:
+                    stats.expanded += 1
+                for i in range(*movie_range(p, movie_filter)):
+                    m = person_movies[i]
+                    if m in seen_movies:
+                        continue
+                    seen_movies.add(m)
+                    for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                        q = movie_people[j]
+                        if q in parents:
+                            continue
+                        parents[q] = (m, p)
+                        if q == target:
+                            return _walk_back(parents, target)
+                        next_frontier.append(q)
+                if stats is not None:
+                    # People still to expand, as a single queue would hold
+                    stats.frontier_size(
+                        len(frontier) - k - 1 + len(next_frontier)
+                    )
+            frontier = next_frontier
+        return None
+
+    def bidirectional_path(self, source, target, stats=None,
+                           movie_filter=None):
+        """
+        Bidirectional breadth-first search between two person numbers,
+        always expanding a full level of the smaller frontier.
+
+        Returns the same list of (movie, person) number pairs as
+        shortest_path, or None if the two are not connected. A
+        MovieFilter restricts the movies followed as in shortest_path.
+        """
+        if source == target:
+            return []
+
+        excluded = movie_filter.excluded if movie_filter else ()
+        forward = {source: None}
+        backward = {target: None}
+        forward_movies = set(excluded)
+        backward_movies = set(excluded)
+        forward_frontier = [source]
+        backward_frontier = [target]
+
+        meeting = None
+        while forward_frontier and backward_frontier and meeting is None:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = self._expand_level(
+                    forward_frontier, forward, forward_movies, backward,
+                    len(backward_frontier), stats, movie_filter
+                )
+            else:
+                backward_frontier, meeting = self._expand_level(
+                    backward_frontier, backward, backward_movies, forward,
+                    len(forward_frontier), stats, movie_filter
+                )
+
+        if meeting is None:
+            return None
+
+        path = _walk_back(forward, meeting)
+        p = meeting
+        while backward[p] is not None:
+            m, p = backward[p]
+            path.append((m, p))
+        return path
+
+    def _expand_level(self, frontier, parents, seen_movies, other_parents,
+                      other_size, stats, movie_filter=None):
+        """
+        Expands one level of a bidirectional search. Returns the next
+        frontier and the first person also reached from the other side,
+        or None if the sides have not met. The frontier size recorded
+        counts both sides, the other side's being `other_size`.
+        """
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        movie_range = self.movie_range
+
+        next_frontier = []
+        for k, p in enumerate(frontier):
+            if stats is not None:
+                stats.expanded += 1
+            for i in range(*movie_range(p, movie_filter)):
+                m = person_movies[i]
+                if m in seen_movies:
+                    continue
+                seen_movies.add(m)
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    q = movie_people[j]
+                    if q in parents:
+                        continue
+                    parents[q] = (m, p)
+                    if q in other_parents:
+                        return next_frontier, q
+                    next_frontier.append(q)
+            if stats is not None:
+                stats.frontier_size(
+                    len(frontier) - k - 1 + len(next_frontier) + other_size
+                )
+        return next_frontier, None
+
+
+class MovieFilter():
+    """
+    Which movies a search may pass through: those released from
+    `first_year` to `last_year` inclusive (None for no limit on that
+    side) and not among the movie numbers in `excluded`.
+    """
+    def __init__(self, first_year=None, last_year=None, excluded=()):
+        self.first_year = first_year
+        self.last_year = last_year
+        self.excluded = frozenset(excluded)
+
+    def by_year(self):
+        return self.first_year is not None or self.last_year is not None
+
+
+def _year_bounds(first, last):
+    # Unknown years are stored as 0, so any limit leaves them out
+    return (1 if first is None else first,
+            2 ** 31 - 1 if last is None else last)
+
+
+def release_year(year):
+    """
+    Parses a year from movies.csv, returning 0 if it is missing or odd.
+    """
+    try:
+        return int(year)
+    except ValueError:
+        return 0
+
+
+def _walk_back(parents, p):
+    """
+    Follows `parents` from person `p` back to the search root, returning
+    the (movie, person) steps in order from the root.
+    """
+    path = []
+    while parents[p] is not None:
+        m, parent = parents[p]
+        path.append((m, p))
+        p = parent
+    path.reverse()
+    return path
+
+
+def load_graph(directory):
+    """
+    Load the CSV files in `directory` straight into a Graph, without
+    building the per-person and per-movie dictionaries.
+    """
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        person_rows = sorted(
+            (row[0], row[1], row[2]) for row in reader
+        )
+
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        movie_rows = sorted(
+            (row[0], row[1], row[2]) for row in reader
+        )
+
+    person_numbers = {row[0]: i for i, row in enumerate(person_rows)}
+    movie_numbers = {row[0]: i for i, row in enumerate(movie_rows)}
+
+    star_people = array("i")
+    star_movies = array("i")
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for person_id, movie_id in reader:
+            p = person_numbers.get(person_id)
+            m = movie_numbers.get(movie_id)
+            if p is None or m is None:
+                continue
+            star_people.append(p)
+            star_movies.append(m)
+
+    return _build(person_rows, movie_rows, star_people, star_movies)
+
+
+def build_graph(people, movies):
+    """
+    Build a Graph from the `people` and `movies` dictionaries that
+    degrees.load_data fills in.
+    """
+    person_rows = sorted(
+        (person_id, person["name"], person["birth"])
+        for person_id, person in people.items()
+    )
+    movie_rows = sorted(
+        (movie_id, movie["title"], movie["year"])
+        for movie_id, movie in movies.items()
+    )
+    movie_numbers = {row[0]: i for i, row in enumerate(movie_rows)}
+
+    star_people = array("i")
+    star_movies = array("i")
+    for p, (person_id, _, _) in enumerate(person_rows):
+        for movie_id in people[person_id]["movies"]:
+            star_people.append(p)
+            star_movies.append(movie_numbers[movie_id])
+
+    return _build(person_rows, movie_rows, star_people, star_movies)
+
+
+def update_graph(graph, delta):
+    """
+    Returns a new Graph with `delta` (see updates.py) applied to `graph`,
+    and an array mapping each old person number to its new number (-1
+    for people removed), or None if every person kept their number.
+
+    Adding people, movies and stars and removing stars keep everyone's
+    number: new people and movies are numbered after the existing ones
+    and merged into the id and name orders, and only the adjacency rows
+    that change are rebuilt, with runs of unchanged rows copied across
+    as whole slices. The cost is a copy of the arrays plus work in
+    proportion to the delta, not a reload. Removing people or movies
+    renumbers everyone after them, so then the graph is rebuilt from its
+    own arrays instead.
+    """
+    if delta.remove_people or delta.remove_movies:
+        return _rebuild(graph, delta)
+
+    person_count = graph.person_count()
+    movie_count = graph.movie_count()
+    person_ids, person_names, person_births, person_order, renamed = \
+        _add_rows(graph.person_ids, graph.person_names, graph.person_births,
+                  graph.person_order, delta.add_people)
+    movie_ids, movie_titles, movie_years, movie_order, _ = \
+        _add_rows(graph.movie_ids, graph.movie_titles, graph.movie_years,
+                  graph.movie_order, delta.add_movies)
+
+    # New movies get their years appended; a movie whose year changes
+    # moves in the year order and in every one of its stars' rows
+    release_years = array("i", graph.release_years)
+    release_years.extend(
+        release_year(movie_years[m])
+        for m in range(movie_count, len(movie_ids))
+    )
+    redated = set()
+    for movie_id, _, year in delta.add_movies:
+        m = _index(movie_ids, movie_id, movie_order)
+        if m < movie_count and release_year(year) != graph.release_years[m]:
+            release_years[m] = release_year(year)
+            redated.add(m)
+    redated = sorted(redated)
+
+    year_order = array("i", graph.year_order)
+    old_year_key = _year_key(graph.release_years)
+    for m in redated:
+        del year_order[
+            bisect_left(year_order, old_year_key(m), key=old_year_key)
+        ]
+    year_key = _year_key(release_years)
+    year_order = _insert_sorted(
+        year_order, redated + list(range(movie_count, len(movie_ids))),
+        year_key
+    )
+
+    # Take renamed people out of the name order under their old names,
+    # then merge them back in with the new people under their new ones
+    name_order = array("i", graph.name_order)
+    old_key = graph._name_key
+    for p in renamed:
+        i = bisect_left(name_order, old_key(p), key=old_key)
+        while name_order[i] != p:
+            i += 1
+        del name_order[i]
+
+    def new_key(p):
+        return person_names[p].lower()
+
+    name_order = _insert_sorted(
+        name_order, renamed + list(range(person_count, len(person_ids))),
+        new_key
+    )
+
+    person_rows = {}
+    movie_rows = {}
+
+    def person_row(p):
+        if p not in person_rows:
+            person_rows[p] = set(_row(graph.person_offsets, graph.person_movies, p))
+        return person_rows[p]
+
+    def movie_row(m):
+        if m not in movie_rows:
+            movie_rows[m] = set(_row(graph.movie_offsets, graph.movie_people, m))
+        return movie_rows[m]
+
+    for person_id, movie_id in delta.remove_stars:
+        p = graph.person_index(person_id)
+        m = graph.movie_index(movie_id)
+        if p is not None and m is not None:
+            person_row(p).discard(m)
+            movie_row(m).discard(p)
+    for person_id, movie_id in delta.add_stars:
+        p = _index(person_ids, person_id, person_order)
+        m = _index(movie_ids, movie_id, movie_order)
+        if p is not None and m is not None:
+            person_row(p).add(m)
+            movie_row(m).add(p)
+    for m in redated:
+        for p in movie_row(m):
+            person_row(p)
+
+    person_offsets, person_movies = _splice(
+        graph.person_offsets, graph.person_movies,
+        {p: sorted(row, key=year_key) for p, row in person_rows.items()},
+        len(person_ids)
+    )
+    movie_offsets, movie_people = _splice(
+        graph.movie_offsets, graph.movie_people,
+        {m: sorted(row) for m, row in movie_rows.items()}, len(movie_ids)
+    )
+
+    return Graph(
+        person_ids, person_names, person_births,
+        movie_ids, movie_titles, movie_years,
+        person_offsets, person_movies,
+        movie_offsets, movie_people,
+        name_order, release_years, year_order,
+        person_order=person_order, movie_order=movie_order,
+    ), None
+
+
+def _add_rows(ids, firsts, seconds, order, rows):
+    """
+    Applies added (id, a, b) rows to one StringTable triple: rows with a
+    known id replace its details and the rest are appended. Returns the
+    new tables, the new sorted order (None if still the identity) and
+    the numbers of existing rows whose first field changed.
+    """
+    count = len(ids)
+    replace_firsts = {}
+    replace_seconds = {}
+    appended = {}
+    for row_id, a, b in rows:
+        i = _index(ids, row_id, order)
+        if i is None:
+            appended[row_id] = (a, b)
+        else:
+            if firsts[i] != a:
+                replace_firsts[i] = a
+            replace_seconds[i] = b
+    if not replace_firsts and not replace_seconds and not appended:
+        return ids, firsts, seconds, order, []
+
+    new_ids = ids.updated(append=list(appended))
+    firsts = firsts.updated(
+        replace_firsts, [a for a, _ in appended.values()]
+    )
+    seconds = seconds.updated(
+        replace_seconds, [b for _, b in appended.values()]
+    )
+    if appended:
+        if order is None:
+            order = array("i", range(count))
+        order = _insert_sorted(
+            order, list(range(count, len(new_ids))), new_ids.__getitem__
+        )
+    return new_ids, firsts, seconds, order, sorted(replace_firsts)
+
+
+def _insert_sorted(order, new, key):
+    """
+    Returns `order` (sorted by `key`) with the numbers in `new` merged
+    in. A few are inserted by binary search; many are merged in one pass.
+    """
+    order = array("i", order)
+    if len(new) <= 64:
+        for x in new:
+            order.insert(bisect_left(order, key(x), key=key), x)
+        return order
+    return array("i", heapq.merge(order, sorted(new, key=key), key=key))
+
+
+def _row(offsets, indices, r):
+    if r + 1 >= len(offsets):
+        return ()
+    return indices[offsets[r]:offsets[r + 1]]
+
+
+def _splice(offsets, indices, changes, count):
+    """
+    Returns CSR offsets and indices for `count` rows (at least as many
+    as before) with each row in `changes` replaced by its new entries.
+    Unchanged rows are copied as whole slices, so the cost is a memory
+    copy plus work in proportion to the changed rows.
+    """
+    old_count = len(offsets) - 1
+    new_offsets = array("i", [0])
+    new_indices = array("i")
+
+    def copy(start, stop):
+        # Rows start..stop-1 unchanged; rows past the old end are empty
+        end = min(stop, old_count)
+        if end > start:
+            shift = len(new_indices) - offsets[start]
+            run = memoryview(indices)[offsets[start]:offsets[end]]
+            new_indices.frombytes(run.cast("B"))
+            new_offsets.extend(map(shift.__add__, offsets[start + 1:end + 1]))
+        empty = stop - max(start, old_count)
+        if empty > 0:
+            new_offsets.extend([len(new_indices)] * empty)
+
+    row = 0
+    for r in sorted(changes):
+        copy(row, r)
+        new_indices.extend(changes[r])
+        new_offsets.append(len(new_indices))
+        row = r + 1
+    copy(row, count)
+    return new_offsets, new_indices
+
+
+def _rebuild(graph, delta):
+    """
+    update_graph for deltas that remove people or movies: rebuilds the
+    adjacency from the old graph's arrays rather than by parsing the
+    CSVs, renumbering everyone.
+    """
+    person_rows, person_map = _merge_rows(
+        graph.person_ids, graph.person_names, graph.person_births,
+        delta.add_people, delta.remove_people
+    )
+    movie_rows, movie_map = _merge_rows(
+        graph.movie_ids, graph.movie_titles, graph.movie_years,
+        delta.add_movies, delta.remove_movies
+    )
+
+    remove_stars = set()
+    for person_id, movie_id in delta.remove_stars:
+        p = graph.person_index(person_id)
+        m = graph.movie_index(movie_id)
+        if p is not None and m is not None:
+            remove_stars.add((p, m))
+
+    star_people = array("i")
+    star_movies = array("i")
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    for p in range(graph.person_count()):
+        new_p = person_map[p]
+        if new_p < 0:
+            continue
+        for i in range(person_offsets[p], person_offsets[p + 1]):
+            m = person_movies[i]
+            if movie_map[m] < 0 or (p, m) in remove_stars:
+                continue
+            star_people.append(new_p)
+            star_movies.append(movie_map[m])
+
+    person_ids = [row[0] for row in person_rows]
+    movie_ids = [row[0] for row in movie_rows]
+    for person_id, movie_id in delta.add_stars:
+        p = _index(person_ids, person_id)
+        m = _index(movie_ids, movie_id)
+        if p is not None and m is not None:
+            star_people.append(p)
+            star_movies.append(m)
+
+    return _build(person_rows, movie_rows, star_people, star_movies), person_map
+
+
+def _merge_rows(ids, firsts, seconds, added, removed):
+    """
+    Merges the rows of one StringTable triple with added (id, a, b) rows,
+    dropping removed ids. Returns the rows sorted by id and an array
+    mapping each old number to its new number, or -1 if it was removed.
+    """
+    added = {row[0]: row for row in added}
+    rows = []
+    for i in range(len(ids)):
+        row_id = ids[i]
+        if row_id in removed:
+            continue
+        row = added.pop(row_id, None)
+        if row is None:
+            row = (row_id, firsts[i], seconds[i])
+        rows.append((row_id, row[1], row[2], i))
+    rows.extend((row_id, a, b, -1) for row_id, a, b in added.values())
+    rows.sort()
+
+    numbers = array("i", [-1]) * len(ids)
+    for new, row in enumerate(rows):
+        if row[3] >= 0:
+            numbers[row[3]] = new
+    return rows, numbers
+
+
+def _index(ids, row_id, order=None):
+    """
+    Binary search for `row_id` in `ids`, which are sorted unless `order`
+    gives their sorted order. Returns its number or None.
+    """
+    if order is None:
+        i = bisect_left(ids, row_id)
+        if i < len(ids) and ids[i] == row_id:
+            return i
+        return None
+    i = bisect_left(order, row_id, key=ids.__getitem__)
+    if i < len(order) and ids[order[i]] == row_id:
+        return order[i]
+    return None
+
+
+def _build(person_rows, movie_rows, star_people, star_movies):
+    """
+    Assemble a Graph from (id, name, birth) and (id, title, year) rows,
+    both sorted by id, and parallel arrays of (person, movie) star links.
+    Rows may carry extra fields after the first three.
+    """
+    release_years = array("i", (release_year(row[2]) for row in movie_rows))
+    year_key = _year_key(release_years)
+
+    person_offsets, person_movies = _csr(
+        len(person_rows), star_people, star_movies
+    )
+    person_offsets, person_movies = _dedupe_rows(
+        person_offsets, person_movies, year_key
+    )
+
+    # Reading person rows in order gives each movie its cast sorted too
+    movie_offsets, movie_people = _transpose(
+        len(movie_rows), person_offsets, person_movies
+    )
+    year_order = array("i", sorted(range(len(movie_rows)), key=year_key))
+
+    name_order = array("i", sorted(
+        range(len(person_rows)), key=lambda p: person_rows[p][1].lower()
+    ))
+
+    return Graph(
+        StringTable.from_strings(row[0] for row in person_rows),
+        StringTable.from_strings(row[1] for row in person_rows),
+        StringTable.from_strings(row[2] for row in person_rows),
+        StringTable.from_strings(row[0] for row in movie_rows),
+        StringTable.from_strings(row[1] for row in movie_rows),
+        StringTable.from_strings(row[2] for row in movie_rows),
+        person_offsets, person_movies,
+        movie_offsets, movie_people,
+        name_order, release_years, year_order,
+    )
+
+
+def _year_key(release_years):
+    """
+    Sort key ordering movie numbers by release year, then number.
+    """
+    def key(m):
+        return (release_years[m], m)
+    return key
+
+
+def _csr(count, rows, columns):
+    """
+    Counting sort parallel `rows`/`columns` arrays into CSR offsets
+    and indices for `count` rows.
+    """
+    offsets = array("i", [0]) * (count + 1)
+    for r in rows:
+        offsets[r + 1] += 1
+    for r in range(count):
+        offsets[r + 1] += offsets[r]
+
+    indices = array("i", [0]) * len(rows)
+    fill = offsets[:-1]
+    for r, c in zip(rows, columns):
+        indices[fill[r]] = c
+        fill[r] += 1
+    return offsets, indices
+
+
+def _dedupe_rows(offsets, indices, key=None):
+    """
+    Sorts every CSR row (by `key` if given) and drops repeated entries,
+    so a star listed twice in stars.csv only links once.
+    """
+    new_offsets = array("i", [0]) * len(offsets)
+    new_indices = array("i")
+    for r in range(len(offsets) - 1):
+        row = set(indices[offsets[r]:offsets[r + 1]])
+        new_indices.extend(sorted(row, key=key))
+        new_offsets[r + 1] = len(new_indices)
+    return new_offsets, new_indices
+
+
+def _transpose(count, offsets, indices):
+    """
+    Returns the CSR form of the transpose of a CSR matrix with
+    `count` columns.
+    """
+    rows = array("i")
+    for r in range(len(offsets) - 1):
+        rows.extend([r] * (offsets[r + 1] - offsets[r]))
+    return _csr(count, indices, rows)
@@ -0,0 +1,247 @@
+import csv
+import io
+import multiprocessing
+import os
+import time
+from array import array
+
+from graph import _build
+
+# Files smaller than this are parsed in one piece without any workers,
+# since forking would cost more than it saves
+MIN_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Bytes read from a chunk at a time
+READ_BYTES = 1024 * 1024
+
+# Numbering of people and movies by IMDB id, set before star workers fork
+_person_numbers = None
+_movie_numbers = None
+
+
+class IngestStats():
+    """
+    How long loading each CSV took and how many rows it held, so the
+    parse rate can be reported. `chunks` counts the pieces each file
+    was split into (1 when it was parsed in-process).
+    """
+    def __init__(self):
+        self.rows = {}
+        self.seconds = {}
+        self.chunks = {}
+
+    def record(self, filename, rows, seconds, chunks):
+        self.rows[filename] = rows
+        self.seconds[filename] = seconds
+        self.chunks[filename] = chunks
+
+    def rows_per_second(self, filename=None):
+        if filename is None:
+            rows = sum(self.rows.values())
+            seconds = sum(self.seconds.values())
+        else:
+            rows = self.rows[filename]
+            seconds = self.seconds[filename]
+        return rows / seconds if seconds else 0.0
+
+    def __str__(self):
+        parts = [
+            f"{filename}: {self.rows[filename]} rows in "
+            f"{self.seconds[filename]:.3f}s "
+            f"({self.rows_per_second(filename):,.0f} rows/s, "
+            f"{self.chunks[filename]} chunk"
+            f"{'' if self.chunks[filename] == 1 else 's'})"
+            for filename in self.rows
+        ]
+        parts.append(f"total {self.rows_per_second():,.0f} rows/s")
+        return "; ".join(parts)
+
+
+def load_graph(directory, workers=None, stats=None):
+    """
+    graph.load_graph, but with each CSV split into byte ranges that are
+    parsed by `workers` processes (default: one per CPU) with plain
+    tuple-producing csv readers. Workers turn star rows straight into
+    person and movie numbers, and the partial star lists are joined into
+    the compact Graph.
+
+    Chunks are cut at line ends, which assumes no quoted field spans
+    lines; a chunk that does not parse into whole rows makes the file
+    be parsed again in one piece. Small files, single workers and
+    platforms without fork are parsed in-process. If `stats` is an
+    IngestStats, rows and timings for each file are recorded in it.
+    """
+    global _person_numbers, _movie_numbers
+    if workers is None:
+        workers = os.cpu_count()
+    if "fork" not in multiprocessing.get_all_start_methods():
+        workers = 1
+    if stats is None:
+        stats = IngestStats()
+
+    person_rows = sorted(
+        _read_rows(directory, "people.csv", 3, workers, stats)
+    )
+    movie_rows = sorted(
+        _read_rows(directory, "movies.csv", 3, workers, stats)
+    )
+
+    _person_numbers = {row[0]: i for i, row in enumerate(person_rows)}
+    _movie_numbers = {row[0]: i for i, row in enumerate(movie_rows)}
+    try:
+        star_people = array("i")
+        star_movies = array("i")
+        for people, movies in _read_chunks(
+            directory, "stars.csv", 2, workers, stats, _parse_stars
+        ):
+            star_people.frombytes(people)
+            star_movies.frombytes(movies)
+    finally:
+        _person_numbers = _movie_numbers = None
+
+    return _build(person_rows, movie_rows, star_people, star_movies)
+
+
+def _read_rows(directory, filename, width, workers, stats):
+    rows = []
+    for chunk in _read_chunks(
+        directory, filename, width, workers, stats, _parse_rows
+    ):
+        rows.extend(chunk)
+    return rows
+
+
+def _read_chunks(directory, filename, width, workers, stats, parse):
+    """
+    Parses `filename` with parse(path, start, end, width) over byte
+    ranges, returning the results in file order and recording the
+    file's row count and time in `stats`. `parse` returns a row count
+    and its result, or None if the range did not hold whole rows.
+    """
+    path = os.path.join(directory, filename)
+    start = time.perf_counter()
+    ranges = chunk_ranges(path, workers)
+    results = None
+    if len(ranges) > 1:
+        context = multiprocessing.get_context("fork")
+        with context.Pool(min(workers, len(ranges))) as pool:
+            results = pool.starmap(
+                parse, [(path, a, b, width) for a, b in ranges]
+            )
+        if any(result is None for result in results):
+            results = None
+    if results is None:
+        ranges = chunk_ranges(path, 1)
+        results = [parse(path, *ranges[0], width, strict=False)]
+
+    rows = sum(count for count, _ in results)
+    stats.record(filename, rows, time.perf_counter() - start, len(ranges))
+    return [result for _, result in results]
+
+
+def chunk_ranges(path, workers, min_bytes=MIN_CHUNK_BYTES):
+    """
+    Splits the CSV at `path`, after its header line, into (start, end)
+    byte ranges of whole lines: about four per worker, but none smaller
+    than `min_bytes`.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        first = f.tell()
+        count = min(workers * 4, (size - first) // min_bytes)
+        if workers <= 1 or count <= 1:
+            return [(first, size)]
+        boundaries = [first]
+        for i in range(1, count):
+            f.seek(first + (size - first) * i // count)
+            f.readline()
+            if f.tell() > boundaries[-1]:
+                boundaries.append(f.tell())
+        boundaries.append(size)
+    return [
+        (a, b) for a, b in zip(boundaries, boundaries[1:]) if b > a
+    ]
+
+
+def _lines(path, start, end):
+    """
+    Yields the lines of the byte range [start, end) of the CSV at
+    `path`, a range chunk_ranges cut at line ends, without holding more
+    than READ_BYTES of it at a time. The range holding everything after
+    the header is read as a text file instead.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        header = f.readline()
+        if len(header.encode("utf-8")) == start \
+                and end == os.fstat(f.fileno()).st_size:
+            yield from f
+            return
+
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        rest = b""
+        while remaining > 0:
+            block = f.read(min(READ_BYTES, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            block = rest + block
+            # Only whole lines are decoded, so no character is cut
+            cut = block.rfind(b"\n") + 1
+            rest = block[cut:]
+            yield from io.StringIO(block[:cut].decode("utf-8"), newline="")
+        if rest:
+            yield rest.decode("utf-8")
+
+
+def _parse_rows(path, start, end, width, strict=True):
+    """
+    Returns the number of rows in one byte range and the rows as tuples
+    of their first `width` fields. In `strict` mode, returns None if any
+    row does not have exactly `width` fields, which is what a quoted
+    field cut in half or a misquoted row looks like. Otherwise, as
+    csv.DictReader would, extra fields are ignored and missing ones are
+    left empty.
+    """
+    rows = []
+    for row in csv.reader(_lines(path, start, end)):
+        if not row:
+            continue
+        if len(row) != width:
+            if strict:
+                return None
+            row = row[:width] + [""] * (width - len(row))
+        rows.append(tuple(row))
+    return len(rows), rows
+
+
+def _parse_stars(path, start, end, width, strict=True):
+    """
+    Returns the number of star rows in one byte range and the bytes of
+    two int arrays of their person and movie numbers, skipping rows
+    with unknown ids. In `strict` mode, returns None if any row does
+    not have exactly `width` fields; otherwise extra fields are ignored
+    and rows missing an id are skipped, as the dictionary loader does.
+    """
+    person_numbers = _person_numbers
+    movie_numbers = _movie_numbers
+    star_people = array("i")
+    star_movies = array("i")
+    rows = 0
+    for row in csv.reader(_lines(path, start, end)):
+        if not row:
+            continue
+        if len(row) != width and strict:
+            return None
+        rows += 1
+        if len(row) < width:
+            continue
+        p = person_numbers.get(row[0])
+        m = movie_numbers.get(row[1])
+        if p is None or m is None:
+            continue
+        star_people.append(p)
+        star_movies.append(m)
+    return rows, (star_people.tobytes(), star_movies.tobytes())
@@ -0,0 +1,319 @@
+import heapq
+import json
+import mmap
+import multiprocessing
+import os
+import random
+import struct
+from array import array
+
+from snapshot import source_stamps
+
+# Bump whenever the layout of the landmarks file changes
+VERSION = 2
+
+MAGIC = b"DEGLMRK\0"
+FILENAME = "degrees.landmarks"
+
+# Distances are stored one byte per person; 255 marks "not reachable"
+# and anything further away is clamped to 254, which keeps every bound
+# computed from them a valid lower bound
+UNREACHABLE = 255
+FARTHEST = 254
+
+# The fixed part of the header: magic, version, length of the JSON header
+PREAMBLE = struct.Struct("<8sII")
+
+
+class LandmarkIndex():
+    """
+    Breadth-first distances from a few landmark people to everyone else.
+
+    By the triangle inequality, |d(L, a) - d(L, b)| <= d(a, b) for every
+    landmark L, so the index gives instant lower bounds on the degrees of
+    separation between any two people. Distances from landmark i are
+    distances[i * n:(i + 1) * n] for n people.
+    """
+    def __init__(self, landmarks, distances, person_count):
+        self.landmarks = landmarks
+        self.distances = distances
+        self.person_count = person_count
+
+    def lower_bound(self, a, b):
+        """
+        Returns a lower bound on the distance between person numbers
+        `a` and `b`, or None if some landmark reaches exactly one of them
+        (so they cannot be connected).
+        """
+        n = self.person_count
+        distances = self.distances
+        bound = 0
+        for offset in range(0, len(self.landmarks) * n, n):
+            da = distances[offset + a]
+            db = distances[offset + b]
+            if da == UNREACHABLE or db == UNREACHABLE:
+                if da != db:
+                    return None
+                continue
+            if da > db:
+                if da - db > bound:
+                    bound = da - db
+            elif db - da > bound:
+                bound = db - da
+        return bound
+
+
+def landmarks_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def farthest_people(nearest, count, rng, exclude=()):
+    """
+    Returns up to `count` people whose distance in `nearest` (the distance
+    to the closest landmark chosen so far) is greatest, picking at random
+    among people at the same distance so a batch spreads out instead of
+    clustering. People with UNREACHABLE are never picked.
+    """
+    by_distance = {}
+    for p, d in enumerate(nearest):
+        if d != UNREACHABLE and p not in exclude:
+            by_distance.setdefault(d, []).append(p)
+    chosen = []
+    for d in sorted(by_distance, reverse=True):
+        people = by_distance[d]
+        need = count - len(chosen)
+        chosen.extend(rng.sample(people, min(need, len(people))))
+        if len(chosen) == count or d == 0:
+            break
+    return chosen
+
+
+def bfs_distances(graph, source):
+    """
+    Returns a byte array of the distance from person `source` to every
+    person, with UNREACHABLE for people in other components.
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+
+    distances = bytearray([UNREACHABLE]) * graph.person_count()
+    seen_movies = bytearray(graph.movie_count())
+    distances[source] = 0
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth = min(depth + 1, FARTHEST)
+        next_frontier = []
+        for p in frontier:
+            for i in range(person_offsets[p], person_offsets[p + 1]):
+                m = person_movies[i]
+                if seen_movies[m]:
+                    continue
+                seen_movies[m] = 1
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    q = movie_people[j]
+                    if distances[q] == UNREACHABLE:
+                        distances[q] = depth
+                        next_frontier.append(q)
+        frontier = next_frontier
+    return distances
+
+
+# The graph being indexed, inherited by forked workers
+_worker_graph = None
+
+
+def _worker_distances(source):
+    return bfs_distances(_worker_graph, source)
+
+
+def build_landmarks(graph, k, workers=None, seed=0):
+    """
+    Chooses `k` landmarks by farthest selection and keeps the distances
+    from each to everyone.
+
+    Hubs make poor landmarks on a co-star graph, since almost everyone
+    is within a hop or two of them and the bounds they give are close to
+    zero. Instead the search starts from the best-connected person and
+    repeatedly adds the people farthest from every landmark so far, out
+    on the edges of the graph. Landmarks are added in batches of one per
+    worker process (default: one per CPU), and the searches for a batch
+    run in parallel.
+    """
+    global _worker_graph
+    if workers is None:
+        workers = os.cpu_count()
+    rng = random.Random(seed)
+    offsets = graph.person_offsets
+    hub = max(
+        range(graph.person_count()),
+        key=lambda p: offsets[p + 1] - offsets[p],
+        default=None,
+    )
+    if hub is None or k <= 0:
+        return LandmarkIndex(array("i"), b"", graph.person_count())
+
+    pool = None
+    if workers > 1 and k > 1 \
+            and "fork" in multiprocessing.get_all_start_methods():
+        _worker_graph = graph
+        context = multiprocessing.get_context("fork")
+        pool = context.Pool(min(workers, k))
+    try:
+        nearest = bfs_distances(graph, hub)
+        landmarks = []
+        rows = []
+        while len(landmarks) < k:
+            batch = farthest_people(
+                nearest, min(workers, k - len(landmarks)), rng, set(landmarks)
+            )
+            if not batch:
+                break
+            if pool is None:
+                batch_rows = [bfs_distances(graph, p) for p in batch]
+            else:
+                batch_rows = pool.map(_worker_distances, batch)
+            for row in batch_rows:
+                nearest = bytes(map(min, nearest, row))
+            landmarks.extend(batch)
+            rows.extend(batch_rows)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        _worker_graph = None
+
+    return LandmarkIndex(
+        array("i", landmarks), b"".join(rows), graph.person_count()
+    )
+
+
+def save_landmarks(index, directory):
+    """
+    Write `index` next to the CSVs in `directory`, recording the state
+    of the CSVs it was built from.
+    """
+    header = json.dumps({
+        "sources": source_stamps(directory),
+        "person_count": index.person_count,
+        "landmarks": list(index.landmarks),
+    }).encode("utf-8")
+
+    path = landmarks_path(directory)
+    with open(path + ".tmp", "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        f.write(index.distances)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def load_landmarks(directory, person_count):
+    """
+    Memory-map the landmark index in `directory`.
+
+    Returns None if there is none, it was written by a different version,
+    or it does not match the CSVs or the number of people loaded.
+    """
+    path = landmarks_path(directory)
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, version, header_length = PREAMBLE.unpack_from(data)
+    except struct.error:
+        return None
+    if magic != MAGIC or version != VERSION:
+        return None
+
+    start = PREAMBLE.size + header_length
+    header = json.loads(data[PREAMBLE.size:start])
+    try:
+        if header["sources"] != source_stamps(directory):
+            return None
+    except OSError:
+        return None
+    if header["person_count"] != person_count:
+        return None
+
+    landmarks = array("i", header["landmarks"])
+    distances = memoryview(data)[start:start + len(landmarks) * person_count]
+    return LandmarkIndex(landmarks, distances, person_count)
+
+
+def alt_path(graph, index, source, target, stats=None):
+    """
+    A* search from person `source` to person `target`, guided by the
+    landmark lower bounds (the "ALT" algorithm).
+
+    Returns a list of (movie, person) number pairs, or None if the two
+    are not connected.
+    """
+    if source == target:
+        return []
+    bound = index.lower_bound(source, target)
+    if bound is None:
+        return None
+
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+    lower_bound = index.lower_bound
+
+    costs = {source: 0}
+    parents = {source: None}
+    done = set()
+    # Ties on the estimate go to the person furthest along, which is
+    # usually the one closest to the target
+    heap = [(bound, 0, source)]
+    best = None
+    while heap:
+        # The bound never overestimates, so once nothing left can beat
+        # the best path to the target found so far, that path is shortest
+        if best is not None and heap[0][0] >= best:
+            break
+        _, cost, p = heapq.heappop(heap)
+        cost = -cost
+        if p in done:
+            continue
+        done.add(p)
+        if stats is not None:
+            stats.expanded += 1
+
+        cost += 1
+        for i in range(person_offsets[p], person_offsets[p + 1]):
+            m = person_movies[i]
+            for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                q = movie_people[j]
+                if q in done or costs.get(q, cost + 1) <= cost:
+                    continue
+                costs[q] = cost
+                parents[q] = (m, p)
+                # Like breadth-first search, the target is noticed as soon
+                # as it is generated rather than when it is expanded
+                if q == target:
+                    best = cost
+                    continue
+                estimate = lower_bound(q, target)
+                if estimate is None:
+                    continue
+                heapq.heappush(heap, (cost + estimate, -cost, q))
+        if stats is not None:
+            stats.frontier_size(len(heap))
+
+    if best is None:
+        return None
+    path = []
+    p = target
+    while parents[p] is not None:
+        m, parent = parents[p]
+        path.append((m, p))
+        p = parent
+    path.reverse()
+    return path
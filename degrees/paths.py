@@ -0,0 +1,251 @@
+import heapq
+from array import array
+
+
+class ShortestPathDAG():
+    """
+    Every shortest path between two people, recorded by one breadth-first
+    search from the source that stops after the target's level.
+
+    depths[p] is the distance of person p from the source (-1 if not
+    reached). Rather than listing every predecessor person, which a hub
+    movie's cast would blow up quadratically, each person keeps only the
+    movies that first reached them: the predecessors through movie m are
+    the cast members of m one level closer to the source. So the DAG
+    takes memory proportional to the people and movies reached.
+    """
+    def __init__(self, graph, source, target, depths, via_movies):
+        self.graph = graph
+        self.source = source
+        self.target = target
+        self.depths = depths
+        self.via_movies = via_movies
+
+    def connected(self):
+        return self.depths[self.target] >= 0
+
+    def length(self):
+        """
+        Returns the length of the shortest paths, or None if there are none.
+        """
+        if not self.connected():
+            return None
+        return self.depths[self.target]
+
+    def predecessors(self, q):
+        """
+        Yields (movie, person) pairs for each step into person `q` that
+        lies on a shortest path from the source.
+        """
+        graph = self.graph
+        depths = self.depths
+        offsets = graph.movie_offsets
+        people = graph.movie_people
+        depth = depths[q] - 1
+        for m in self.via_movies.get(q, ()):
+            for j in range(offsets[m], offsets[m + 1]):
+                p = people[j]
+                if depths[p] == depth:
+                    yield m, p
+
+    def count(self):
+        """
+        Returns the number of distinct shortest paths, where paths through
+        different movies count separately, without enumerating them.
+        """
+        if not self.connected():
+            return 0
+        counts = {self.source: 1}
+        for q in self._on_paths():
+            if q == self.source:
+                continue
+            counts[q] = sum(counts[p] for _, p in self.predecessors(q))
+        return counts[self.target]
+
+    def _on_paths(self):
+        """
+        Returns the people on some shortest path to the target, in order
+        of increasing distance from the source.
+        """
+        on_paths = {self.target}
+        level = [self.target]
+        while level:
+            next_level = []
+            for q in level:
+                for _, p in self.predecessors(q):
+                    if p not in on_paths:
+                        on_paths.add(p)
+                        next_level.append(p)
+            level = next_level
+        return sorted(on_paths, key=self.depths.__getitem__)
+
+    def paths(self):
+        """
+        Lazily yields every shortest path as a list of (movie, person)
+        number pairs. Only the path being built is held in memory, so
+        this is safe even when there are astronomically many paths.
+        """
+        if not self.connected():
+            return
+        if self.target == self.source:
+            yield []
+            return
+        # Walk backwards from the target, one predecessor iterator per step
+        steps = []
+        stack = [(self.target, self.predecessors(self.target))]
+        while stack:
+            q, predecessors = stack[-1]
+            step = next(predecessors, None)
+            if step is None:
+                stack.pop()
+                if steps:
+                    steps.pop()
+                continue
+            m, p = step
+            steps.append((m, q))
+            if p == self.source:
+                yield steps[::-1]
+                steps.pop()
+            else:
+                stack.append((p, self.predecessors(p)))
+
+
+def shortest_path_dag(graph, source, target):
+    """
+    Builds the ShortestPathDAG from person `source` to person `target`
+    on a compact Graph.
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+
+    depths = array("i", [-1]) * graph.person_count()
+    seen_movies = bytearray(graph.movie_count())
+    via_movies = {}
+    depths[source] = 0
+    frontier = [source]
+    depth = 0
+    while frontier and depths[target] < 0:
+        depth += 1
+        next_frontier = []
+        for p in frontier:
+            for i in range(person_offsets[p], person_offsets[p + 1]):
+                m = person_movies[i]
+                if seen_movies[m]:
+                    continue
+                # A movie's cast is scanned once, from the level that
+                # reaches it first; everyone new in it joins via m
+                seen_movies[m] = 1
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    q = movie_people[j]
+                    if depths[q] < 0:
+                        depths[q] = depth
+                        next_frontier.append(q)
+                    elif depths[q] != depth:
+                        continue
+                    via_movies.setdefault(q, []).append(m)
+        frontier = next_frontier
+    return ShortestPathDAG(graph, source, target, depths, via_movies)
+
+
+def yen_paths(graph, source, target, k=None):
+    """
+    Lazily yields up to `k` loop-free paths from person `source` to person
+    `target` in order of length (Yen's algorithm), each as a list of
+    (movie, person) number pairs. Without `k`, yields paths until there
+    are no more, which on a real graph means effectively forever.
+
+    Only the paths already yielded and the pending candidates are kept.
+    """
+    first = _restricted_path(graph, source, target, set(), {})
+    if first is None:
+        return
+    found = [first]
+    seen = {tuple(first)}
+    candidates = []
+    counter = 0
+    while True:
+        path = found[-1]
+        yield path
+        if k is not None and len(found) >= k:
+            return
+
+        people = [source] + [p for _, p in path]
+        for i in range(len(path)):
+            root = path[:i]
+            spur = people[i]
+
+            # Steps out of the spur already used by found paths sharing
+            # this root are banned, as are the root's own people
+            banned_steps = {}
+            for other in found:
+                if len(other) > i and other[:i] == root:
+                    m, q = other[i]
+                    banned_steps.setdefault((spur, m), set()).add(q)
+            banned_people = set(people[:i])
+
+            spur_path = _restricted_path(
+                graph, spur, target, banned_people, banned_steps
+            )
+            if spur_path is None:
+                continue
+            candidate = root + spur_path
+            key = tuple(candidate)
+            if key in seen:
+                continue
+            seen.add(key)
+            heapq.heappush(candidates, (len(candidate), counter, candidate))
+            counter += 1
+
+        if not candidates:
+            return
+        found.append(heapq.heappop(candidates)[2])
+
+
+def _restricted_path(graph, source, target, banned_people, banned_steps):
+    """
+    Breadth-first search for a shortest path that avoids the people in
+    `banned_people` and, for each (person, movie) key of `banned_steps`,
+    the people it maps to. Returns (movie, person) pairs or None.
+    """
+    if source == target:
+        return []
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+
+    parents = {source: None}
+    seen_movies = set()
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for p in frontier:
+            for i in range(person_offsets[p], person_offsets[p + 1]):
+                m = person_movies[i]
+                if m in seen_movies:
+                    continue
+                banned = banned_steps.get((p, m))
+                # A movie with a banned step may still lead elsewhere
+                # from another person, so only mark it seen otherwise
+                if banned is None:
+                    seen_movies.add(m)
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    q = movie_people[j]
+                    if q in parents or q in banned_people:
+                        continue
+                    if banned is not None and q in banned:
+                        continue
+                    parents[q] = (m, p)
+                    if q == target:
+                        path = []
+                        while parents[q] is not None:
+                            m, parent = parents[q]
+                            path.append((m, q))
+                            q = parent
+                        path.reverse()
+                        return path
+                    next_frontier.append(q)
+        frontier = next_frontier
+    return None
@@ -0,0 +1,349 @@
+import argparse
+import asyncio
+import collections
+import json
+import multiprocessing
+import os
+import time
+
+import degrees
+from batch import POLICIES, resolve_person
+from benchmark import percentiles
+
+# Searches and latencies kept for the metrics, per kind of request
+LATENCY_WINDOW = 10000
+
+# Seconds a search may run before everyone waiting on it is answered
+# with an error
+SEARCH_TIMEOUT = 60
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load the data once and answer degrees queries until "
+                    "stopped. Clients send one JSON request per line and "
+                    "get one JSON response per line; see Server.handle for "
+                    "the requests understood."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5050)
+    parser.add_argument(
+        "--socket", metavar="PATH",
+        help="listen on a Unix socket at PATH instead of a TCP port"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=os.cpu_count(),
+        help="number of worker processes searching at once "
+             "(default: one per CPU)"
+    )
+    parser.add_argument(
+        "--cache-size", type=int, default=10000,
+        help="number of search results to keep (default: 10000)"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=SEARCH_TIMEOUT,
+        help="seconds a search may take before it fails "
+             f"(default: {SEARCH_TIMEOUT})"
+    )
+    parser.add_argument(
+        "--ambiguous", choices=POLICIES, default="error",
+        help="how to resolve names shared by several people"
+    )
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    options = {"compact": args.compact, "cache": not args.no_cache}
+    degrees.load_data(args.directory, **options)
+    print("Data loaded.")
+
+    # Workers are forked now, after loading, so they share the graph
+    pool = None
+    if args.workers > 1:
+        if "fork" in multiprocessing.get_all_start_methods():
+            pool = multiprocessing.get_context("fork").Pool(args.workers)
+        else:
+            pool = multiprocessing.Pool(
+                args.workers, initializer=_load_worker,
+                initargs=(args.directory, options)
+            )
+    server = Server(pool, args.cache_size, args.ambiguous, args.timeout)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def _load_worker(directory, options):
+    degrees.load_data(directory, **options)
+
+
+class LRUCache():
+    """
+    Mapping of at most `capacity` entries that forgets the least
+    recently used entry first, counting hits and misses.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns (True, value) for a cached key, marking it as recently
+        used, or (False, None).
+        """
+        if key not in self.entries:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return True, self.entries[key]
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+
+class Server():
+    """
+    Answers requests against the data degrees has loaded.
+
+    Searches run in `pool`'s worker processes (or a thread if there is
+    no pool), so the event loop keeps answering name lookups and other
+    connections while they run. Results are cached by (source_id,
+    target_id, method), and a search already running for a key is
+    shared rather than started again. A search that has not finished
+    after `timeout` seconds, for example because its worker died, fails
+    for everyone waiting on it.
+    """
+    def __init__(self, pool, cache_size, policy, timeout=SEARCH_TIMEOUT):
+        self.pool = pool
+        self.cache = LRUCache(cache_size)
+        self.policy = policy
+        self.timeout = timeout
+        self.pending = {}
+        self.started = time.time()
+        self.counts = collections.Counter()
+        self.errors = collections.Counter()
+        self.latencies = collections.defaultdict(
+            lambda: collections.deque(maxlen=LATENCY_WINDOW)
+        )
+
+    async def serve(self, host, port, socket=None):
+        if socket is not None:
+            server = await asyncio.start_unix_server(self.connection, socket)
+            print(f"Listening on {socket}.")
+        else:
+            server = await asyncio.start_server(self.connection, host, port)
+            print(f"Listening on {host}:{port}.")
+        async with server:
+            await server.serve_forever()
+
+    async def connection(self, reader, writer):
+        """
+        Reads requests from one client, answering each as soon as it is
+        done, so responses may come back out of order; a request's "id"
+        is echoed in its response to match them up.
+        """
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self.respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            writer.close()
+
+    async def respond(self, line, writer):
+        start = time.perf_counter()
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request is not a JSON object")
+        except ValueError as e:
+            request = {}
+            response = {"error": f"bad request: {e}"}
+        else:
+            try:
+                response = await self.handle(request)
+            except asyncio.TimeoutError:
+                response = {"error": "search timed out"}
+            except Exception as e:
+                response = {"error": str(e) or type(e).__name__}
+        if "id" in request:
+            response["id"] = request["id"]
+
+        op = request.get("op") if request.get("op") in HANDLERS else "invalid"
+        self.counts[op] += 1
+        if "error" in response:
+            self.errors[op] += 1
+        self.latencies[op].append(time.perf_counter() - start)
+        writer.write(json.dumps(response).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    async def handle(self, request):
+        """
+        Returns the response to one request, a dictionary whose "op" is
+        one of:
+
+            path      the shortest path from "source" to "target" (names
+                      or IMDB ids), as degrees and a list of movie_id and
+                      person_id steps; "method" may be "bidirectional"
+            distance  the same, but only the degrees of separation
+            lookup    the people with a given "name", with their births
+            metrics   request counts, cache hit rate and latencies
+
+        Failures are reported with an "error" key instead.
+        """
+        handler = HANDLERS.get(request.get("op"))
+        if handler is None:
+            return {"error": f"unknown op: {request.get('op')}"}
+        return await handler(self, request)
+
+    async def handle_path(self, request, steps=True):
+        method = request.get("method", "bfs")
+        if method not in ("bfs", "bidirectional"):
+            return {"error": f"unknown search method: {method}"}
+        response = {}
+        for key in ("source", "target"):
+            if not isinstance(request.get(key), str):
+                return {"error": f"missing {key}"}
+            person_id, error = resolve_person(request[key], self.policy)
+            if error is not None:
+                return {"error": error}
+            response[f"{key}_id"] = person_id
+
+        path = await self.search(
+            response["source_id"], response["target_id"], method
+        )
+        response["degrees"] = None if path is None else len(path)
+        if steps:
+            response["path"] = None if path is None else [
+                {"movie_id": movie_id, "person_id": person_id}
+                for movie_id, person_id in path
+            ]
+        return response
+
+    async def handle_distance(self, request):
+        return await self.handle_path(request, steps=False)
+
+    async def handle_lookup(self, request):
+        if not isinstance(request.get("name"), str):
+            return {"error": "missing name"}
+        return {"people": [
+            {"person_id": person_id, **_details(person_id)}
+            for person_id in sorted(degrees.people_for_name(request["name"]))
+        ]}
+
+    async def handle_metrics(self, request):
+        return {
+            "uptime": time.time() - self.started,
+            "cache": self.cache.stats(),
+            "searches_running": len(self.pending),
+            "requests": {
+                op: {
+                    "count": self.counts[op],
+                    "errors": self.errors[op],
+                    "latency": percentiles(self.latencies[op]),
+                }
+                for op in sorted(self.counts)
+            },
+        }
+
+    async def search(self, source, target, method):
+        """
+        Returns the shortest path between two person ids, from the cache
+        or from a search in a worker.
+        """
+        key = (source, target, method)
+        cached, path = self.cache.get(key)
+        if cached:
+            return path
+        future = self.pending.get(key)
+        if future is None:
+            # The timeout applies to the shared search, not to each
+            # waiter, so a search that never finishes still leaves
+            # `pending`
+            future = asyncio.ensure_future(
+                asyncio.wait_for(self._run(_search, key), self.timeout)
+            )
+            self.pending[key] = future
+            future.add_done_callback(lambda _: self.pending.pop(key, None))
+        path = await asyncio.shield(future)
+        self.cache.put(key, path)
+        return path
+
+    def _run(self, func, args):
+        """
+        Runs func(*args) off the event loop and returns an awaitable for
+        its result.
+        """
+        loop = asyncio.get_running_loop()
+        if self.pool is None:
+            return loop.run_in_executor(None, func, *args)
+        future = loop.create_future()
+
+        def done(result):
+            loop.call_soon_threadsafe(_settle, future, result, None)
+
+        def failed(error):
+            loop.call_soon_threadsafe(_settle, future, None, error)
+
+        self.pool.apply_async(func, args, callback=done, error_callback=failed)
+        return future
+
+
+HANDLERS = {
+    "path": Server.handle_path,
+    "distance": Server.handle_distance,
+    "lookup": Server.handle_lookup,
+    "metrics": Server.handle_metrics,
+}
+
+
+def _settle(future, result, error):
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def _search(source, target, method):
+    path = degrees.shortest_path(source, target, method=method)
+    return None if path is None else [tuple(step) for step in path]
+
+
+def _details(person_id):
+    person = degrees.get_person(person_id)
+    return {"name": person["name"], "birth": person["birth"]}
+
+
+if __name__ == "__main__":
+    main()
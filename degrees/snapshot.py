@@ -0,0 +1,170 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from components import Components
+from graph import Graph, StringTable
+
+# Bump whenever the layout of the snapshot file changes
+VERSION = 4
+
+MAGIC = b"DEGSNAP\0"
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Graph attributes stored as int arrays
+ARRAYS = (
+    "person_offsets", "person_movies",
+    "movie_offsets", "movie_people",
+    "name_order", "release_years", "year_order",
+)
+
+# Graph attributes stored as int arrays only when they are not None
+OPTIONAL_ARRAYS = ("person_order", "movie_order")
+
+# Component arrays, stored when the graph's components have been labelled
+COMPONENTS = ("labels", "sizes")
+
+# Graph attributes stored as StringTables
+TABLES = (
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years",
+)
+
+# The fixed part of the header: magic, version, length of the JSON header
+PREAMBLE = struct.Struct("<8sII")
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def source_stamps(directory):
+    """
+    Returns the size and modification time of each source CSV,
+    which a snapshot must match to be used.
+    """
+    stamps = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        stamps[filename] = [stat.st_size, stat.st_mtime_ns]
+    return stamps
+
+
+def save_snapshot(graph, directory):
+    """
+    Write `graph` to a binary snapshot file next to the CSVs in
+    `directory`, recording the state of the CSVs it was built from.
+    """
+    sections = []
+    for name in ARRAYS:
+        sections.append((name, _as_array(getattr(graph, name), "i")))
+    for name in OPTIONAL_ARRAYS:
+        if getattr(graph, name) is not None:
+            sections.append((name, _as_array(getattr(graph, name), "i")))
+    for name in TABLES:
+        table = getattr(graph, name)
+        if not isinstance(table, StringTable):
+            table = StringTable.from_strings(table)
+        sections.append((f"{name}.data", table.data))
+        sections.append((f"{name}.offsets", _as_array(table.offsets, "q")))
+    if graph.components is not None:
+        for name in COMPONENTS:
+            section = _as_array(getattr(graph.components, name), "i")
+            sections.append((f"components.{name}", section))
+
+    # Lay the sections out after the header, each aligned to 8 bytes
+    layout = {}
+    position = 0
+    for name, section in sections:
+        view = memoryview(section)
+        layout[name] = {
+            "format": view.format,
+            "offset": position,
+            "length": view.nbytes,
+        }
+        position = _align(position + view.nbytes)
+
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "sources": source_stamps(directory),
+        "sections": layout,
+    }).encode("utf-8")
+    start = _align(PREAMBLE.size + len(header))
+
+    path = snapshot_path(directory)
+    with open(path + ".tmp", "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for name, section in sections:
+            f.seek(start + layout[name]["offset"])
+            f.write(section)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def load_snapshot(directory):
+    """
+    Memory-map the snapshot in `directory` and return it as a Graph.
+
+    Returns None if there is no snapshot, it was written by a different
+    version, or the CSVs have changed since it was built.
+    """
+    path = snapshot_path(directory)
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, version, header_length = PREAMBLE.unpack_from(data)
+    except struct.error:
+        return None
+    if magic != MAGIC or version != VERSION:
+        return None
+
+    header = json.loads(data[PREAMBLE.size:PREAMBLE.size + header_length])
+    if header["byteorder"] != sys.byteorder:
+        return None
+    try:
+        if header["sources"] != source_stamps(directory):
+            return None
+    except OSError:
+        return None
+
+    # Every section is a zero-copy view into the mapped file
+    view = memoryview(data)
+    start = _align(PREAMBLE.size + header_length)
+    sections = {}
+    for name, section in header["sections"].items():
+        offset = start + section["offset"]
+        sections[name] = view[offset:offset + section["length"]].cast(
+            section["format"]
+        )
+
+    fields = {name: sections[name] for name in ARRAYS}
+    for name in OPTIONAL_ARRAYS:
+        fields[name] = sections.get(name)
+    for name in TABLES:
+        fields[name] = StringTable(
+            sections[f"{name}.data"], sections[f"{name}.offsets"]
+        )
+    if "components.labels" in sections:
+        fields["components"] = Components(
+            *(sections[f"components.{name}"] for name in COMPONENTS)
+        )
+    return Graph(**fields)
+
+
+def _as_array(values, typecode):
+    if isinstance(values, array) and values.typecode == typecode:
+        return values
+    return array(typecode, values)
+
+
+def _align(n):
+    return (n + 7) // 8 * 8
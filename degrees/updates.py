@@ -0,0 +1,216 @@
+import csv
+import os
+
+
+class Delta():
+    """
+    A batch of changes to the people/movies/stars data.
+
+    Added people and movies are (id, name, birth) and (id, title, year)
+    rows; adding one whose id already exists replaces its details but
+    keeps its star links. Added and removed stars are (person_id,
+    movie_id) pairs. Removing a person or movie also removes its stars.
+    Removals are applied before additions.
+    """
+    def __init__(self, add_people=(), add_movies=(), add_stars=(),
+                 remove_people=(), remove_movies=(), remove_stars=()):
+        self.add_people = list(add_people)
+        self.add_movies = list(add_movies)
+        self.add_stars = list(add_stars)
+        self.remove_people = set(remove_people)
+        self.remove_movies = set(remove_movies)
+        self.remove_stars = set(remove_stars)
+
+    def removes(self):
+        """
+        Returns True if the delta removes anything, which can split
+        connected components.
+        """
+        return bool(self.remove_people or self.remove_movies
+                    or self.remove_stars)
+
+    def touched_movies(self):
+        """
+        Returns the ids of movies that gain stars.
+        """
+        return {movie_id for _, movie_id in self.add_stars}
+
+
+# Files a delta directory may contain, in the same format as the dataset:
+# additions use the dataset's own columns, removals only the id columns
+ADD_FILES = {
+    "add_people": ("people.csv", ("id", "name", "birth")),
+    "add_movies": ("movies.csv", ("id", "title", "year")),
+    "add_stars": ("stars.csv", ("person_id", "movie_id")),
+}
+REMOVE_FILES = {
+    "remove_people": ("removed_people.csv", ("id",)),
+    "remove_movies": ("removed_movies.csv", ("id",)),
+    "remove_stars": ("removed_stars.csv", ("person_id", "movie_id")),
+}
+
+
+def read_delta(directory):
+    """
+    Reads a Delta from the CSV files in `directory`. Every file is
+    optional, so a daily batch of new star rows can be just stars.csv.
+    """
+    fields = {}
+    for field, (filename, columns) in {**ADD_FILES, **REMOVE_FILES}.items():
+        path = os.path.join(directory, filename)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            rows = [tuple(row[column] for column in columns) for row in reader]
+        if field in REMOVE_FILES and len(columns) == 1:
+            rows = [row[0] for row in rows]
+        fields[field] = rows
+    return Delta(**fields)
+
+
+def update_dicts(names, people, movies, delta):
+    """
+    Applies `delta` in place to the names/people/movies dictionaries
+    that degrees.load_data fills in.
+    """
+    for person_id, movie_id in delta.remove_stars:
+        if person_id in people:
+            people[person_id]["movies"].discard(movie_id)
+        if movie_id in movies:
+            movies[movie_id]["stars"].discard(person_id)
+
+    for person_id in delta.remove_people:
+        person = people.pop(person_id, None)
+        if person is None:
+            continue
+        for movie_id in person["movies"]:
+            movies[movie_id]["stars"].discard(person_id)
+        _forget_name(names, person["name"], person_id)
+
+    for movie_id in delta.remove_movies:
+        movie = movies.pop(movie_id, None)
+        if movie is None:
+            continue
+        for person_id in movie["stars"]:
+            people[person_id]["movies"].discard(movie_id)
+
+    for person_id, name, birth in delta.add_people:
+        person = people.get(person_id)
+        if person is None:
+            people[person_id] = {"name": name, "birth": birth, "movies": set()}
+        else:
+            _forget_name(names, person["name"], person_id)
+            person["name"] = name
+            person["birth"] = birth
+        names.setdefault(name.lower(), set()).add(person_id)
+
+    for movie_id, title, year in delta.add_movies:
+        movie = movies.get(movie_id)
+        if movie is None:
+            movies[movie_id] = {"title": title, "year": year, "stars": set()}
+        else:
+            movie["title"] = title
+            movie["year"] = year
+
+    for person_id, movie_id in delta.add_stars:
+        if person_id in people and movie_id in movies:
+            people[person_id]["movies"].add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+
+
+def _forget_name(names, name, person_id):
+    person_ids = names.get(name.lower())
+    if person_ids is None:
+        return
+    person_ids.discard(person_id)
+    if not person_ids:
+        del names[name.lower()]
+
+
+def write_delta(directory, delta, replaced_people=(), replaced_movies=()):
+    """
+    Writes `delta` into the dataset's CSVs in `directory`, so the CSVs
+    keep describing the same data as the updated graph and everything
+    stamped against them (the snapshot, the landmark index) stays honest.
+
+    `replaced_people` and `replaced_movies` are the added ids that
+    already existed. Additions of new rows are appended; a file is only
+    rewritten, by streaming through it, if rows in it are removed or
+    replaced.
+    """
+    new_people = [
+        row for row in delta.add_people if row[0] not in replaced_people
+    ]
+    new_movies = [
+        row for row in delta.add_movies if row[0] not in replaced_movies
+    ]
+    replace_people = {
+        row[0]: row for row in delta.add_people if row[0] in replaced_people
+    }
+    replace_movies = {
+        row[0]: row for row in delta.add_movies if row[0] in replaced_movies
+    }
+
+    def person_row(row):
+        if row[0] in delta.remove_people:
+            return None
+        return replace_people.get(row[0], row)
+
+    def movie_row(row):
+        if row[0] in delta.remove_movies:
+            return None
+        return replace_movies.get(row[0], row)
+
+    def star_row(row):
+        if row[0] in delta.remove_people or row[1] in delta.remove_movies \
+                or tuple(row) in delta.remove_stars:
+            return None
+        return row
+
+    _write_rows(
+        os.path.join(directory, "people.csv"), new_people,
+        person_row if delta.remove_people or replace_people else None
+    )
+    _write_rows(
+        os.path.join(directory, "movies.csv"), new_movies,
+        movie_row if delta.remove_movies or replace_movies else None
+    )
+    _write_rows(
+        os.path.join(directory, "stars.csv"), delta.add_stars,
+        star_row if delta.removes() else None
+    )
+
+
+def _write_rows(path, added, rewrite):
+    """
+    Adds rows to the CSV at `path`. With `rewrite`, the file is first
+    copied through it: it maps each existing row to the row to keep, or
+    None to drop it.
+    """
+    if rewrite is None:
+        if not added:
+            return
+        with open(path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            needs_newline = False
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            if needs_newline:
+                f.write("\n")
+            csv.writer(f, lineterminator="\n").writerows(added)
+        return
+
+    with open(path, newline="", encoding="utf-8") as source, \
+            open(path + ".tmp", "w", newline="", encoding="utf-8") as f:
+        reader = csv.reader(source)
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(next(reader))
+        for row in reader:
+            row = rewrite(row)
+            if row is not None:
+                writer.writerow(row)
+        writer.writerows(added)
+    os.replace(path + ".tmp", path)
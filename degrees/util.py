@@ -1,38 +1,318 @@
+import heapq
+import itertools
+import time
+from collections import deque
+
+
 class Node():
-    def __init__(self, state, parent, action):
+    __slots__ = ("state", "parent", "action", "cost", "depth")
+
+    def __init__(self, state, parent, action, cost=0):
         self.state = state
         self.parent = parent
         self.action = action
+        self.cost = cost
+        self.depth = 0 if parent is None else parent.depth + 1
+
+    def path(self):
+        """
+        Returns the (action, state) pairs leading from the root to this
+        node, not including the root itself.
+        """
+        path = []
+        node = self
+        while node.parent is not None:
+            path.append((node.action, node.state))
+            node = node.parent
+        path.reverse()
+        return path
 
 
 class StackFrontier():
+    """
+    Last-in, first-out frontier. Membership is tracked in a dictionary
+    of state counts, so contains_state does not scan the frontier.
+    """
     def __init__(self):
         self.frontier = []
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
 
+    def __len__(self):
+        return len(self.frontier)
+
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self._forget(node)
             return node
 
+    def _forget(self, node):
+        count = self.states[node.state] - 1
+        if count == 0:
+            del self.states[node.state]
+        else:
+            self.states[node.state] = count
+
 
 class QueueFrontier(StackFrontier):
+    """
+    First-in, first-out frontier backed by a deque, so removing from
+    the front is O(1).
+    """
+    def __init__(self):
+        super().__init__()
+        self.frontier = deque()
 
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self._forget(node)
             return node
+
+
+class PriorityFrontier(StackFrontier):
+    """
+    Frontier that always removes the node with the lowest priority,
+    backed by a binary heap. `priority` maps a node to a sortable value;
+    ties are broken in the order nodes were added.
+    """
+    def __init__(self, priority):
+        super().__init__()
+        self.priority = priority
+        self.counter = itertools.count()
+
+    def add(self, node):
+        heapq.heappush(
+            self.frontier, (self.priority(node), next(self.counter), node)
+        )
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = heapq.heappop(self.frontier)[2]
+            self._forget(node)
+            return node
+
+
+class SearchStats():
+    """
+    Counters describing how much work a search did: nodes expanded,
+    the largest the frontier grew, and wall time spent searching.
+    The frontier is measured after each expansion as every node still
+    waiting to be expanded, on both sides of a bidirectional search, so
+    the searches and backends report the same quantity.
+    A single SearchStats can be shared by several searches to total them.
+    """
+    def __init__(self):
+        self.expanded = 0
+        self.peak_frontier = 0
+        self.elapsed = 0.0
+
+    def frontier_size(self, size):
+        """
+        Records how many nodes are waiting to be expanded.
+        """
+        if size > self.peak_frontier:
+            self.peak_frontier = size
+
+    def timer(self):
+        return _Timer(self)
+
+    def __str__(self):
+        return (
+            f"{self.expanded} nodes expanded, "
+            f"peak frontier {self.peak_frontier}, "
+            f"{self.elapsed:.3f}s"
+        )
+
+
+class _Timer():
+    """
+    Context manager adding the time spent inside it to a SearchStats.
+    """
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, *exc):
+        self.stats.elapsed += time.perf_counter() - self.start
+        return False
+
+
+def breadth_first_search(start, goal_test, successors, stats=None):
+    """
+    Breadth-first search from state `start`.
+
+    `successors(state)` returns (action, state) pairs and `goal_test(state)`
+    says whether a state is a goal. Goals are tested as they are generated,
+    which is safe for breadth-first search. Returns the goal Node, or None
+    if no goal can be reached.
+    """
+    if stats is None:
+        stats = SearchStats()
+    with stats.timer():
+        root = Node(start, None, None)
+        if goal_test(start):
+            return root
+        frontier = QueueFrontier()
+        frontier.add(root)
+        reached = {start}
+        while not frontier.empty():
+            node = frontier.remove()
+            stats.expanded += 1
+            for action, state in successors(node.state):
+                if state in reached:
+                    continue
+                reached.add(state)
+                child = Node(state, node, action)
+                if goal_test(state):
+                    return child
+                frontier.add(child)
+            stats.frontier_size(len(frontier))
+    return None
+
+
+def depth_first_search(start, goal_test, successors, stats=None,
+                       limit=None):
+    """
+    Depth-first search from state `start`, taking the same arguments as
+    breadth_first_search. Nodes deeper than `limit` are not expanded.
+    States already on the frontier or expanded are never added again.
+    """
+    if stats is None:
+        stats = SearchStats()
+    with stats.timer():
+        frontier = StackFrontier()
+        frontier.add(Node(start, None, None))
+        explored = set()
+        while not frontier.empty():
+            node = frontier.remove()
+            if goal_test(node.state):
+                return node
+            explored.add(node.state)
+            if limit is not None and node.depth >= limit:
+                continue
+            stats.expanded += 1
+            for action, state in successors(node.state):
+                if state not in explored and not frontier.contains_state(state):
+                    frontier.add(Node(state, node, action))
+            stats.frontier_size(len(frontier))
+    return None
+
+
+def iterative_deepening_search(start, goal_test, successors, stats=None,
+                               max_depth=None):
+    """
+    Runs depth-limited searches with limits 0, 1, 2, ... until a goal is
+    found, so the goal returned is a shallowest one. Gives up after
+    `max_depth` if it is set, and otherwise once a round reaches every
+    reachable state without being cut off, so unreachable goals end the
+    search even in graphs with cycles.
+    """
+    if stats is None:
+        stats = SearchStats()
+    for limit in itertools.count():
+        if max_depth is not None and limit > max_depth:
+            return None
+        node, cut_off = _depth_limited(
+            start, goal_test, successors, stats, limit
+        )
+        if node is not None:
+            return node
+        # Nothing was cut off at this depth, so going deeper cannot help
+        if not cut_off:
+            return None
+
+
+def _depth_limited(start, goal_test, successors, stats, limit):
+    """
+    One round of iterative deepening, returning the goal Node (or None)
+    and whether any state was cut off by the limit.
+
+    Each state is remembered with the shallowest depth it has been
+    reached at in this round and only searched again if a shorter route
+    to it turns up. That keeps a round from exploring every simple path
+    of a cyclic graph, and a round only counts as cut off if some state
+    is first reached exactly at the limit.
+    """
+    with stats.timer():
+        best = {start: 0}
+        stack = [(Node(start, None, None), None)]
+        while stack:
+            node, children = stack[-1]
+            if children is None:
+                if goal_test(node.state):
+                    return node, True
+                if node.depth >= limit:
+                    stack.pop()
+                    continue
+                stats.expanded += 1
+                children = iter(successors(node.state))
+                stack[-1] = (node, children)
+                stats.frontier_size(len(stack))
+            depth = node.depth + 1
+            for action, state in children:
+                if best.get(state, depth + 1) > depth:
+                    best[state] = depth
+                    stack.append((Node(state, node, action), None))
+                    break
+            else:
+                stack.pop()
+    return None, any(depth == limit for depth in best.values())
+
+
+def astar_search(start, goal_test, successors, heuristic, stats=None,
+                 step_cost=None):
+    """
+    A* search from state `start`. `heuristic(state)` must never
+    overestimate the remaining cost, and `step_cost(state, action, next)`
+    defaults to 1 per step. Returns the goal Node, or None.
+    """
+    if stats is None:
+        stats = SearchStats()
+    with stats.timer():
+        frontier = PriorityFrontier(
+            lambda node: (node.cost + heuristic(node.state), -node.cost)
+        )
+        frontier.add(Node(start, None, None))
+        costs = {start: 0}
+        explored = set()
+        while not frontier.empty():
+            node = frontier.remove()
+            if node.state in explored:
+                continue
+            if goal_test(node.state):
+                return node
+            explored.add(node.state)
+            stats.expanded += 1
+            for action, state in successors(node.state):
+                if state in explored:
+                    continue
+                if step_cost is None:
+                    cost = node.cost + 1
+                else:
+                    cost = node.cost + step_cost(node.state, action, state)
+                if cost < costs.get(state, cost + 1):
+                    costs[state] = cost
+                    frontier.add(Node(state, node, action, cost))
+            stats.frontier_size(len(frontier))
+    return None
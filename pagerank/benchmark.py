@@ -0,0 +1,278 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import crawler
+from linkgraph import build_link_graph
+from local import push_ranks
+from outofcore import EdgeFile, build_edge_file, stream_pagerank
+from parallel import parallel_pagerank
+from personalized import personalized_ranks
+from sampling import sample_ranks
+from solvers import (
+    METHODS, TOLERANCE, SolveStats, l1_distance, power_iteration, solve
+)
+
+DAMPING = 0.85
+SAMPLES = 100000
+
+# Residual thresholds tried for local push by default
+EPSILONS = [1e-3, 1e-4, 1e-5, 1e-6]
+
+# The tolerance of the reference solve errors are measured against
+REFERENCE_TOLERANCE = 1e-12
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the PageRank solvers on a corpus."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    solvers = commands.add_parser(
+        "solvers",
+        help="time every solver and measure its error against a "
+             "high-precision reference"
+    )
+    solvers.add_argument("corpus")
+    solvers.add_argument(
+        "--tolerance", type=float, default=TOLERANCE,
+        help=f"L1 tolerance for the iterative solvers (default: {TOLERANCE})"
+    )
+    solvers.add_argument(
+        "-n", "--samples", type=int, default=SAMPLES,
+        help=f"samples for sample_pagerank (default: {SAMPLES})"
+    )
+    solvers.add_argument(
+        "-w", "--workers", type=int, default=2,
+        help="worker processes for the parallel solver (default: 2)"
+    )
+    solvers.add_argument(
+        "--no-memory", action="store_true",
+        help="skip the second, traced run of each solver that measures "
+             "its peak memory"
+    )
+    solvers.add_argument(
+        "--json", metavar="FILE",
+        help="also write the results to FILE as JSON"
+    )
+
+    local = commands.add_parser(
+        "local",
+        help="compare local push with the global solver for personalized "
+             "PageRank around random seed pages"
+    )
+    local.add_argument("corpus")
+    local.add_argument("-n", "--queries", type=int, default=10)
+    local.add_argument("--seed", type=int, default=0)
+    local.add_argument(
+        "--epsilon", type=float, action="append",
+        help="residual threshold for local push (may be repeated; "
+             "default: " + ", ".join(map(str, EPSILONS)) + ")"
+    )
+    local.add_argument(
+        "--tolerance", type=float, action="append",
+        help="L1 tolerance for the global solver (may be repeated; "
+             "default: 1e-3 and 1e-6)"
+    )
+    args = parser.parse_args()
+
+    if args.command == "solvers":
+        benchmark_solvers(args)
+    else:
+        benchmark_local(args)
+
+
+def benchmark_solvers(args):
+    graph = build_link_graph(crawler.crawl(args.corpus))
+    print(f"{args.corpus}: {graph.page_count()} pages, "
+          f"{graph.link_count()} links, {len(graph.dangling)} dangling")
+    start = time.perf_counter()
+    reference = power_iteration(graph, DAMPING, tolerance=REFERENCE_TOLERANCE)
+    print(f"Reference: power iteration to L1 tolerance "
+          f"{REFERENCE_TOLERANCE:g}, {time.perf_counter() - start:.3f}s")
+
+    results = compare_solvers(
+        graph, args.corpus, DAMPING, reference, args.tolerance,
+        args.samples, args.workers, memory=not args.no_memory
+    )
+    for result in results:
+        memory = result["peak_memory"]
+        memory = "" if memory is None else f", {memory / 2 ** 20:8.2f} MiB"
+        error = result["error"]
+        error = "" if error is None else f", L1 error {error:.2e}"
+        print(
+            f"  {result['solver']:>15}: {result['seconds']:8.3f}s, "
+            f"{result['iterations']:>8} iterations{error}{memory}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "corpus": args.corpus,
+                "pages": graph.page_count(),
+                "links": graph.link_count(),
+                "damping": DAMPING,
+                "tolerance": args.tolerance,
+                "results": results,
+            }, f, indent=2)
+
+
+def compare_solvers(graph, directory, damping, reference, tolerance,
+                    samples, workers, memory=True):
+    """
+    Runs each solver on `graph` (crawled from `directory`, which the
+    streaming solver reads again from disk) and returns, for each, its
+    wall time, iterations (samples, for sampling), L1 error against
+    `reference` and, with `memory`, the peak memory Python allocated
+    while it ran, measured in a second run with tracemalloc so that
+    tracing does not slow the timed run.
+
+    The streaming solver's edge file is built before any solver runs,
+    as the others are given a LinkGraph already built, and building it
+    is reported as a row of its own, with no error.
+    """
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "edges")
+        start = time.perf_counter()
+        build_edge_file(directory, path)
+        seconds = time.perf_counter() - start
+        peak = None
+        if memory:
+            tracemalloc.start()
+            build_edge_file(directory, path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        with EdgeFile(path) as edges:
+            results = _compare_solvers(
+                graph, edges, damping, reference, tolerance, samples,
+                workers, memory
+            )
+    results.append({
+        "solver": "edge file build",
+        "seconds": seconds,
+        "iterations": 0,
+        "error": None,
+        "peak_memory": peak,
+    })
+    return results
+
+
+def _compare_solvers(graph, edges, damping, reference, tolerance, samples,
+                     workers, memory):
+    solvers = {
+        method: lambda method=method: solve(
+            graph, damping, method, tolerance=tolerance, stats=stats
+        )
+        for method in METHODS
+    }
+    solvers["parallel"] = lambda: parallel_pagerank(
+        graph, damping, workers, tolerance, stats
+    )
+    solvers["streaming"] = lambda: stream_pagerank(
+        edges, damping, tolerance, stats=stats
+    )
+    solvers["sampling"] = lambda: sample_ranks(
+        graph, damping, samples, rng=random.Random(0)
+    )
+
+    results = []
+    for name, run in solvers.items():
+        stats = SolveStats()
+        start = time.perf_counter()
+        ranks = run()
+        seconds = time.perf_counter() - start
+        iterations = samples if name == "sampling" else stats.iterations()
+        peak = None
+        if memory:
+            tracemalloc.start()
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        results.append({
+            "solver": name,
+            "seconds": seconds,
+            "iterations": iterations,
+            "error": l1_distance(ranks, reference),
+            "peak_memory": peak,
+        })
+    return results
+
+
+def benchmark_local(args):
+    graph = build_link_graph(crawler.crawl(args.corpus))
+    n = graph.page_count()
+    seeds = random.Random(args.seed).sample(
+        range(n), min(args.queries, n)
+    )
+    print(f"{len(seeds)} seed pages on {args.corpus} "
+          f"({n} pages, {graph.link_count()} links)")
+    results = compare_local(
+        graph, DAMPING, seeds, args.epsilon or EPSILONS,
+        args.tolerance or [1e-3, 1e-6]
+    )
+    for result in results:
+        print(
+            f"  {result['method']:>22}: {result['seconds'] * 1000:9.2f}ms, "
+            f"L1 error {result['error']:.2e}, "
+            f"{result['touched']:.0f} pages touched"
+        )
+
+
+def compare_local(graph, damping, seeds, epsilons, tolerances):
+    """
+    Solves personalized PageRank for each seed page number in `seeds`
+    with the global solver at each of `tolerances` and with local push
+    at each of `epsilons`. Returns, for each, the mean time per seed,
+    the mean L1 error against a reference solve and the mean number of
+    pages each seed's solve touched.
+    """
+    n = graph.page_count()
+    vectors = []
+    for seed in seeds:
+        vector = [0.0] * n
+        vector[seed] = 1.0
+        vectors.append(vector)
+    references = personalized_ranks(
+        graph, damping, vectors, REFERENCE_TOLERANCE
+    )
+
+    results = []
+    for tolerance in tolerances:
+        seconds = error = 0.0
+        for vector, reference in zip(vectors, references):
+            start = time.perf_counter()
+            ranks, = personalized_ranks(graph, damping, [vector], tolerance)
+            seconds += time.perf_counter() - start
+            error += l1_distance(ranks, reference)
+        results.append({
+            "method": f"global, tolerance {tolerance:g}",
+            "seconds": seconds / len(seeds),
+            "error": error / len(seeds),
+            "touched": n,
+        })
+    for epsilon in epsilons:
+        seconds = error = touched = 0.0
+        for seed, reference in zip(seeds, references):
+            start = time.perf_counter()
+            estimate = push_ranks(graph, damping, seed, epsilon)
+            seconds += time.perf_counter() - start
+            error += sum(
+                abs(estimate.ranks.get(i, 0.0) - rank)
+                for i, rank in enumerate(reference)
+            )
+            touched += estimate.touched
+        results.append({
+            "method": f"local push, epsilon {epsilon:g}",
+            "seconds": seconds / len(seeds),
+            "error": error / len(seeds),
+            "touched": touched / len(seeds),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    main()
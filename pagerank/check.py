@@ -0,0 +1,302 @@
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+
+import crawler
+from incremental import (
+    PUSH_BUDGET, LinkDelta, UpdateStats, apply_delta, update_ranks
+)
+from linkgraph import build_link_graph
+from local import push_ranks
+from outofcore import EdgeFile, build_edge_file, stream_pagerank
+from parallel import parallel_pagerank
+from personalized import personalized_ranks
+from sampling import parallel_sample
+from solvers import METHODS, l1_distance, power_iteration, solve
+from synthetic import write_corpus
+
+DAMPING = 0.85
+
+# The tolerance of the reference solves results are checked against
+REFERENCE_TOLERANCE = 1e-12
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cross-check the PageRank solvers against each other. "
+                    "Exits non-zero if any check fails."
+    )
+    parser.add_argument(
+        "corpus", nargs="*",
+        default=[
+            os.path.join(os.path.dirname(__file__) or ".", f"corpus{i}")
+            for i in range(3)
+        ]
+    )
+    parser.add_argument(
+        "--generated", type=int, metavar="N", default=2000,
+        help="also check a random corpus of N pages, a tenth of them "
+             "dangling (default: 2000, 0 to skip)"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=1e-8,
+        help="L1 tolerance the solvers are run to (default: 1e-8)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        directories = list(args.corpus)
+        if args.generated:
+            path = os.path.join(scratch, "generated")
+            write_corpus(path, args.generated, dangling=0.1, seed=args.seed)
+            directories.append(path)
+
+        failures = 0
+        for directory in directories:
+            graph = build_link_graph(crawler.crawl(directory))
+            for check in CHECKS:
+                try:
+                    check(directory, graph, args.tolerance, args.seed)
+                except AssertionError as e:
+                    failures += 1
+                    print(f"FAIL {check.__name__} on {directory}: {e}")
+                else:
+                    print(f"ok   {check.__name__} on {directory}")
+    if failures:
+        sys.exit(f"{failures} checks failed.")
+
+
+def corpus_of(graph):
+    """
+    Returns the corpus dictionary, as crawl() returns it, that `graph`
+    was built from.
+    """
+    return {
+        graph.pages[j]: {graph.pages[i] for i in graph.links_from(j)}
+        for j in range(graph.page_count())
+    }
+
+
+def random_link_changes(graph, rng, count):
+    """
+    Returns a LinkDelta adding a link on `count` random pages that have
+    links and removing one from `count` others that have more than one,
+    so no page becomes or stops being dangling.
+    """
+    n = graph.page_count()
+    linked = [j for j in range(n) if graph.out_degrees[j]]
+    delta = LinkDelta()
+    for j in rng.sample(linked, min(count, len(linked))):
+        missing = set(range(n)) - set(graph.links_from(j)) - {j}
+        if missing:
+            i = rng.choice(sorted(missing))
+            delta.add_links.add((graph.pages[j], graph.pages[i]))
+    several = [j for j in linked if graph.out_degrees[j] > 1]
+    for j in rng.sample(several, min(count, len(several))):
+        i = rng.choice(list(graph.links_from(j)))
+        delta.remove_links.add((graph.pages[j], graph.pages[i]))
+    return delta
+
+
+def check_update(directory, graph, tolerance, seed):
+    """
+    Updating the ranks after links change, by the warm-started global
+    solve, by local push alone and by local push within its default
+    budget, agrees with solving the changed corpus from scratch.
+    """
+    rng = random.Random(seed)
+    corpus = corpus_of(graph)
+    previous = graph.ranks(
+        power_iteration(graph, DAMPING, tolerance=REFERENCE_TOLERANCE)
+    )
+    delta = random_link_changes(graph, rng, 5)
+    changed = build_link_graph(apply_delta(corpus, delta))
+    expected = power_iteration(
+        changed, DAMPING, tolerance=REFERENCE_TOLERANCE
+    )
+    # What is left of the residual is within the tolerance in all, and
+    # moves the ranks by at most that over (1 - damping)
+    bound = tolerance / (1 - DAMPING)
+    for local, budget in ((False, PUSH_BUDGET), (True, float("inf")),
+                          (True, PUSH_BUDGET)):
+        stats = UpdateStats()
+        ranks = update_ranks(
+            changed, DAMPING, previous, delta, local, tolerance, stats,
+            budget
+        )
+        if local and budget == float("inf"):
+            assert stats.mode == "local", "local update not used"
+        error = l1_distance(ranks, expected)
+        assert error <= bound, \
+            f"{stats.mode} update off by {error:.2e} > {bound:.2e}"
+        assert abs(sum(ranks) - 1) < 1e-9, "ranks do not sum to 1"
+
+
+def check_solvers(directory, graph, tolerance, seed):
+    """
+    Every solver stops within what its tolerance allows of a reference
+    solve.
+    """
+    expected = power_iteration(graph, DAMPING, tolerance=REFERENCE_TOLERANCE)
+    # A step that changes the ranks by the tolerance leaves them at most
+    # damping / (1 - damping) times that from the answer
+    bound = tolerance * DAMPING / (1 - DAMPING)
+    for method in METHODS:
+        ranks = solve(graph, DAMPING, method, tolerance=tolerance)
+        error = l1_distance(ranks, expected)
+        assert error <= bound, f"{method} off by {error:.2e} > {bound:.2e}"
+
+
+def regex_crawl(directory):
+    """
+    Returns the corpus in `directory` as the original crawl() found it,
+    by searching each page for <a href="..."> with a regular expression.
+    """
+    pages = {}
+    for filename in os.listdir(directory):
+        if not filename.endswith(".html"):
+            continue
+        with open(os.path.join(directory, filename), encoding="utf-8") as f:
+            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", f.read())
+        pages[filename] = set(links) - {filename}
+    return {page: links & pages.keys() for page, links in pages.items()}
+
+
+def check_crawler(directory, graph, tolerance, seed):
+    """
+    The streaming HTML parser finds the same links as the original
+    regular expression, with and without the link cache, and with the
+    cache still current after a page changes.
+    """
+    expected = regex_crawl(directory)
+    assert crawler.crawl(directory) == expected, "crawl differs"
+    with tempfile.TemporaryDirectory() as scratch:
+        # Work on a copy so the cache is never written to the corpus
+        copy = os.path.join(scratch, "corpus")
+        os.makedirs(copy)
+        for page in expected:
+            with open(os.path.join(directory, page), "rb") as f:
+                data = f.read()
+            with open(os.path.join(copy, page), "wb") as f:
+                f.write(data)
+        assert crawler.crawl(copy, cache=True) == expected, \
+            "crawl writing the cache differs"
+        assert crawler.crawl(copy, cache=True) == expected, \
+            "crawl from the cache differs"
+
+        page = min(expected)
+        path = os.path.join(copy, page)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(f'<a href="{page}">itself</a>')
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+        assert crawler.crawl(copy, cache=True) == regex_crawl(copy), \
+            "changed page not crawled again"
+
+
+def check_sampling(directory, graph, tolerance, seed):
+    """
+    Nearly every page's rank lies within the confidence interval that
+    parallel batch-means sampling gives it.
+    """
+    expected = power_iteration(graph, DAMPING, tolerance=REFERENCE_TOLERANCE)
+    estimate = parallel_sample(
+        graph, DAMPING, 50 * graph.page_count() + 20000, workers=2,
+        seed=seed, confidence=0.99
+    )
+    outside = [
+        i for i, rank in enumerate(expected)
+        if not estimate.interval(i)[0] <= rank <= estimate.interval(i)[1]
+    ]
+    # One page in a hundred is expected outside; allow for chance
+    assert len(outside) <= max(1, graph.page_count() // 20), \
+        f"{len(outside)} of {graph.page_count()} ranks outside their 99% " \
+        "intervals"
+
+
+def check_personalized(directory, graph, tolerance, seed):
+    """
+    Personalized ranks solved together for several teleport vectors
+    equal each one solved alone.
+    """
+    rng = random.Random(seed)
+    n = graph.page_count()
+    vectors = []
+    for page in rng.sample(range(n), min(4, n)):
+        vector = [0.0] * n
+        vector[page] = 1.0
+        vectors.append(vector)
+    vector = [rng.random() for _ in range(n)]
+    vectors.append(vector)
+    together = personalized_ranks(graph, DAMPING, vectors, tolerance)
+    for vector, ranks in zip(vectors, together):
+        alone, = personalized_ranks(graph, DAMPING, [vector], tolerance)
+        error = l1_distance(ranks, alone)
+        assert error <= 1e-12, f"batched solve off by {error:.2e}"
+
+
+def check_push(directory, graph, tolerance, seed):
+    """
+    Forward push never overestimates a page's personalized rank, and
+    the estimates are off by no more than the residual left unpushed.
+    """
+    rng = random.Random(seed)
+    n = graph.page_count()
+    pages = rng.sample(range(n), min(4, n))
+    vectors = []
+    for page in pages:
+        vector = [0.0] * n
+        vector[page] = 1.0
+        vectors.append(vector)
+    references = personalized_ranks(
+        graph, DAMPING, vectors, REFERENCE_TOLERANCE
+    )
+    for page, expected in zip(pages, references):
+        for epsilon in (1e-3, 1e-5):
+            estimate = push_ranks(graph, DAMPING, page, epsilon)
+            ranks = [estimate.ranks.get(i, 0.0) for i in range(n)]
+            assert all(
+                rank <= true + 1e-9 for rank, true in zip(ranks, expected)
+            ), "push overestimates a rank"
+            error = l1_distance(ranks, expected)
+            assert error <= estimate.residual + 1e-9, \
+                f"push off by {error:.2e} > residual {estimate.residual:.2e}"
+
+
+def check_out_of_core(directory, graph, tolerance, seed):
+    """
+    The streaming solver over an edge file and the shared-memory
+    parallel solver give the ranks power iteration does.
+    """
+    expected = power_iteration(graph, DAMPING, tolerance=tolerance)
+    with tempfile.TemporaryDirectory() as scratch:
+        path = build_edge_file(
+            directory, os.path.join(scratch, "edges"), run_edges=64
+        )
+        with EdgeFile(path) as edges:
+            ranks = stream_pagerank(edges, DAMPING, tolerance, block_edges=50)
+    error = l1_distance(ranks, expected)
+    assert error <= 1e-12, f"streaming off by {error:.2e}"
+    for workers in (2, 3):
+        ranks = parallel_pagerank(graph, DAMPING, workers, tolerance)
+        error = l1_distance(ranks, expected)
+        assert error <= 1e-12, \
+            f"parallel ({workers} workers) off by {error:.2e}"
+
+
+CHECKS = [
+    check_crawler,
+    check_solvers,
+    check_update,
+    check_sampling,
+    check_personalized,
+    check_push,
+    check_out_of_core,
+]
+
+
+if __name__ == "__main__":
+    main()
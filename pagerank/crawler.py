@@ -0,0 +1,131 @@
+import codecs
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+
+# Bump whenever the layout of the cache file, or what counts as a link,
+# changes
+VERSION = 1
+
+FILENAME = "pagerank.links"
+
+# Bytes read from a page at a time
+BLOCK_SIZE = 64 * 1024
+
+
+class LinkExtractor(HTMLParser):
+    """
+    Collects the href of every <a> tag in HTML fed to it piece by piece,
+    so a page never has to be held in memory or searched as a whole.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = set()
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "a":
+            return
+        for name, value in attrs:
+            if name == "href" and value is not None:
+                self.links.add(value)
+
+
+def page_links(path):
+    """
+    Returns the set of links in the HTML page at `path`, reading and
+    parsing it in blocks.
+    """
+    extractor = LinkExtractor()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(path, "rb") as f:
+        while block := f.read(BLOCK_SIZE):
+            extractor.feed(decoder.decode(block))
+    extractor.feed(decoder.decode(b"", final=True))
+    extractor.close()
+    return extractor.links
+
+
+def cache_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def crawl(directory, cache=False, workers=None):
+    """
+    Returns a dictionary mapping each .html page in `directory` to the
+    set of other pages in the directory it links to, like
+    pagerank.crawl.
+
+    Pages are parsed by a pool of `workers` threads (default: chosen by
+    ThreadPoolExecutor). With `cache`, each page's links are kept in a
+    cache file in `directory` with the page's size and modification
+    time, and only pages that are new or have changed since are parsed
+    again.
+    """
+    stamps = {}
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".html") and entry.is_file():
+            stat = entry.stat()
+            stamps[entry.name] = [stat.st_size, stat.st_mtime_ns]
+
+    cached = load_cache(directory) if cache else {}
+    links = {}
+    stale = []
+    for filename, stamp in stamps.items():
+        entry = cached.get(filename)
+        if entry is not None and entry["stamp"] == stamp:
+            links[filename] = set(entry["links"])
+        else:
+            stale.append(filename)
+
+    if stale:
+        with ThreadPoolExecutor(workers) as pool:
+            parsed = pool.map(
+                page_links, (os.path.join(directory, f) for f in stale)
+            )
+            for filename, page in zip(stale, parsed):
+                links[filename] = page
+    if cache and (stale or len(cached) != len(stamps)):
+        save_cache(directory, stamps, links)
+
+    # Only include links to other pages in the corpus
+    return {
+        filename: {
+            link for link in page if link in links and link != filename
+        }
+        for filename, page in links.items()
+    }
+
+
+def load_cache(directory):
+    """
+    Returns the cached {filename: {"stamp", "links"}} entries for
+    `directory`, or an empty dictionary if there is no usable cache.
+    """
+    try:
+        with open(cache_path(directory), encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cached, dict) or cached.get("version") != VERSION:
+        return {}
+    return cached.get("pages", {})
+
+
+def save_cache(directory, stamps, links):
+    """
+    Writes each page's stamp and links to the cache file, replacing it
+    in one step so a crash never leaves a half-written cache.
+    """
+    path = cache_path(directory)
+    pages = {
+        filename: {"stamp": stamps[filename], "links": sorted(links[filename])}
+        for filename in sorted(stamps)
+    }
+    try:
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "pages": pages}, f)
+        os.replace(path + ".tmp", path)
+    except OSError:
+        # A read-only corpus is still crawled, just not cached
+        pass
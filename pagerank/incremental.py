@@ -0,0 +1,216 @@
+from collections import deque
+
+from solvers import TOLERANCE, power_iteration
+
+# A local update falls back to the global solve once its pushes have
+# followed this many times as many links as the graph has
+PUSH_BUDGET = 1.0
+
+
+class LinkDelta():
+    """
+    A batch of changes to a corpus: pages added and removed by name, and
+    links added and removed as (source, target) page name pairs.
+    Removing a page also removes its links. Removals are applied before
+    additions.
+    """
+    def __init__(self, add_pages=(), remove_pages=(), add_links=(),
+                 remove_links=()):
+        self.add_pages = set(add_pages)
+        self.remove_pages = set(remove_pages)
+        self.add_links = set(add_links)
+        self.remove_links = set(remove_links)
+
+    def changes_pages(self):
+        return bool(self.add_pages or self.remove_pages)
+
+
+def diff_corpora(old, new):
+    """
+    Returns the LinkDelta that turns corpus `old` into corpus `new`, for
+    example two crawl() results from before and after an edit.
+    """
+    delta = LinkDelta(
+        add_pages=new.keys() - old.keys(),
+        remove_pages=old.keys() - new.keys(),
+    )
+    for page, links in new.items():
+        old_links = old.get(page, set())
+        delta.add_links.update((page, link) for link in links - old_links)
+        delta.remove_links.update(
+            (page, link) for link in old_links - links
+            if page not in delta.remove_pages
+        )
+    return delta
+
+
+def apply_delta(corpus, delta):
+    """
+    Returns a copy of `corpus` with `delta` applied. Links to pages not
+    in the result are dropped, as crawl() would.
+    """
+    pages = (corpus.keys() - delta.remove_pages) | delta.add_pages
+    result = {page: set(corpus.get(page, ())) for page in pages}
+    for source, target in delta.remove_links:
+        if source in result:
+            result[source].discard(target)
+    for source, target in delta.add_links:
+        if source in result and source != target:
+            result[source].add(target)
+    for links in result.values():
+        links &= pages
+    return result
+
+
+class UpdateStats():
+    """
+    How an update was solved: "local" if only the residual around the
+    change was pushed, and then how many pushes that took, or "global"
+    if power iteration ran from the previous ranks, or from where
+    pushing stopped when it ran out of budget.
+    """
+    def __init__(self):
+        self.mode = None
+        self.pushes = 0
+
+
+def update_ranks(graph, damping, previous, delta=None, local=False,
+                 tolerance=TOLERANCE, stats=None, budget=PUSH_BUDGET):
+    """
+    Returns the PageRank vector of LinkGraph `graph`, the corpus after a
+    change, starting from `previous`, a dictionary of each page's rank
+    before it. Pages that are new get the average rank to start with.
+
+    By default this is power iteration warm-started from the previous
+    ranks, which are already close to the answer. With `local` (and the
+    `delta` that was applied), only the region the change reaches is
+    worked on: see _push. That needs the same pages as before and no
+    page gaining its first link or losing its last, since either shifts
+    rank onto every page; otherwise the global solve is used.
+
+    Pushing is only faster while the change stays local, which a tight
+    `tolerance` or a change near well-linked pages defeats. Once the
+    pushes have followed `budget` times as many links as the graph has
+    (one power step reads each link once), the global solve takes over
+    from the ranks pushed so far.
+    """
+    if stats is None:
+        stats = UpdateStats()
+    n = graph.page_count()
+    ranks = [previous.get(page, 1 / n) for page in graph.pages]
+    total = sum(ranks)
+    ranks = [rank / total for rank in ranks]
+
+    if local and delta is not None and not delta.changes_pages():
+        sources = _changed_degrees(graph, delta)
+        if sources is not None:
+            stats.mode = "local"
+            return _push(graph, damping, ranks, delta, sources, tolerance,
+                         budget * graph.link_count(), stats)
+
+    stats.mode = "global"
+    return power_iteration(graph, damping, ranks, tolerance)
+
+
+def _changed_degrees(graph, delta):
+    """
+    Returns the numbers of the pages whose number of links changed, or
+    None if any of them became or stopped being dangling.
+    """
+    numbers = graph.numbers
+    change = {}
+    for source, _ in delta.add_links:
+        change[source] = change.get(source, 0) + 1
+    for source, _ in delta.remove_links:
+        change[source] = change.get(source, 0) - 1
+    sources = set()
+    for page, difference in change.items():
+        j = numbers.get(page)
+        if j is None or difference == 0:
+            continue
+        degree = graph.out_degrees[j]
+        if degree == 0 or degree == difference:
+            return None
+        sources.add(j)
+    return sources
+
+
+def _push(graph, damping, ranks, delta, sources, tolerance, budget, stats):
+    """
+    Solves for the change in ranks by pushing residuals (Gauss-Southwell
+    iteration), touching only pages the change reaches.
+
+    The previous ranks solved the old corpus, so on the new one their
+    residual -- how far each page is from its PageRank equation -- is
+    only non-zero where links changed: at the targets of added and
+    removed links and of pages whose link count changed. Pushing a
+    page's residual adds it to the page's rank and passes the damped
+    share along each of its links, until no residual is over its share
+    of `tolerance` (tolerance / pages), so the L1 norm of what is left
+    is within `tolerance` as for the global solve. If that needs more
+    than `budget` links followed, power iteration finishes the solve
+    instead.
+
+    A dangling page passes its share to every page equally, as the
+    teleport term does. That residual is never pushed: a residual equal
+    on every page only changes the solution by a multiple of the
+    PageRank vector itself, so renormalising the ranks at the end
+    accounts for it exactly.
+    """
+    n = graph.page_count()
+    numbers = graph.numbers
+    offsets = graph.offsets
+    sources_into = graph.sources
+    out_offsets = graph.out_offsets
+    out_degrees = graph.out_degrees
+    targets = graph.targets
+
+    affected = set()
+    for source, target in delta.add_links | delta.remove_links:
+        if target in numbers:
+            affected.add(numbers[target])
+    for j in sources:
+        affected.update(targets[out_offsets[j]:out_offsets[j + 1]])
+
+    dangling = sum(ranks[j] for j in graph.dangling)
+    base = (1 - damping) / n + damping * dangling / n
+    residuals = {}
+    for i in affected:
+        inflow = sum(
+            ranks[j] / out_degrees[j]
+            for j in sources_into[offsets[i]:offsets[i + 1]]
+        )
+        residuals[i] = base + damping * inflow - ranks[i]
+
+    threshold = tolerance / n
+    queue = deque(i for i, r in residuals.items() if abs(r) > threshold)
+    queued = set(queue)
+    while queue:
+        i = queue.popleft()
+        queued.discard(i)
+        r = residuals[i]
+        if abs(r) <= threshold:
+            continue
+        del residuals[i]
+        stats.pushes += 1
+        ranks[i] += r
+        degree = out_degrees[i]
+        if degree == 0:
+            continue
+        budget -= degree
+        if budget < 0:
+            stats.mode = "global"
+            total = sum(ranks)
+            start = [rank / total for rank in ranks]
+            return power_iteration(graph, damping, start, tolerance)
+        share = damping * r / degree
+        for k in range(out_offsets[i], out_offsets[i + 1]):
+            t = targets[k]
+            residual = residuals.get(t, 0.0) + share
+            residuals[t] = residual
+            if t not in queued and abs(residual) > threshold:
+                queue.append(t)
+                queued.add(t)
+
+    total = sum(ranks)
+    return [rank / total for rank in ranks]
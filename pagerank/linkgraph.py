@@ -0,0 +1,90 @@
+from array import array
+
+
+class LinkGraph():
+    """
+    Compact, integer-indexed form of the corpus that crawl() returns.
+
+    Pages are numbered 0..n-1 in sorted order of their names. The links
+    into each page are kept as a CSR (compressed sparse row) adjacency
+    list of ints, which is the column-stochastic link matrix without its
+    values, so one PageRank step reads every link exactly once:
+
+        pages linking to page i:  sources[offsets[i]:offsets[i + 1]]
+
+    The links out of each page are kept the same way, for following
+    links forwards as a random surfer does:
+
+        pages page j links to:    targets[out_offsets[j]:out_offsets[j + 1]]
+
+    out_degrees[j] is the number of pages page j links to; each of them
+    gets 1/out_degrees[j] of its rank. `dangling` lists the pages with
+    no links, whose rank is spread over every page instead.
+    """
+    def __init__(self, pages, offsets, sources, out_offsets, targets):
+        self.pages = pages
+        self.numbers = {page: i for i, page in enumerate(pages)}
+        self.offsets = offsets
+        self.sources = sources
+        self.out_offsets = out_offsets
+        self.targets = targets
+        self.out_degrees = array(
+            "i", (b - a for a, b in zip(out_offsets, out_offsets[1:]))
+        )
+        self.dangling = array("i", (
+            j for j, degree in enumerate(self.out_degrees) if degree == 0
+        ))
+
+    def page_count(self):
+        return len(self.pages)
+
+    def link_count(self):
+        return len(self.sources)
+
+    def links_into(self, i):
+        return self.sources[self.offsets[i]:self.offsets[i + 1]]
+
+    def links_from(self, j):
+        return self.targets[self.out_offsets[j]:self.out_offsets[j + 1]]
+
+    def ranks(self, vector):
+        """
+        Returns a dictionary mapping each page name to its value in
+        `vector`, as crawl()-style callers expect.
+        """
+        return dict(zip(self.pages, vector))
+
+
+def build_link_graph(corpus):
+    """
+    Builds a LinkGraph from a dictionary mapping each page to the set of
+    pages it links to. Links to pages not in the corpus are ignored.
+    """
+    pages = sorted(corpus)
+    numbers = {page: i for i, page in enumerate(pages)}
+
+    in_rows = [[] for _ in pages]
+    out_rows = []
+    for j, page in enumerate(pages):
+        out_row = sorted(
+            numbers[link] for link in corpus[page] if link in numbers
+        )
+        for i in out_row:
+            in_rows[i].append(j)
+        out_rows.append(out_row)
+
+    offsets, sources = _csr(in_rows)
+    out_offsets, targets = _csr(out_rows)
+    return LinkGraph(pages, offsets, sources, out_offsets, targets)
+
+
+def _csr(rows):
+    """
+    Returns CSR offsets and indices for a list of rows of ints.
+    """
+    offsets = array("i", [0])
+    indices = array("i")
+    for row in rows:
+        indices.extend(row)
+        offsets.append(len(indices))
+    return offsets, indices
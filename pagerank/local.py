@@ -0,0 +1,79 @@
+from collections import deque
+
+# A page's residual is pushed once it is over this times its link count
+EPSILON = 1e-4
+
+
+class LocalEstimate():
+    """
+    Personalized PageRank around one seed page, as found by push_ranks.
+
+    `ranks` maps the numbers of the pages reached to their estimates;
+    every other page is estimated at 0. Every estimate is at most its
+    true value, and `residual` -- the rank not yet pushed out -- is how
+    far off they are in all (L1 norm). `pushes` counts push operations
+    and `touched` the pages that were given any residual.
+    """
+    def __init__(self, ranks, residual, pushes, touched):
+        self.ranks = ranks
+        self.residual = residual
+        self.pushes = pushes
+        self.touched = touched
+
+    def top(self, k):
+        """
+        Returns the k (page number, rank) pairs with the highest ranks.
+        """
+        return sorted(self.ranks.items(), key=lambda item: -item[1])[:k]
+
+
+def push_ranks(graph, damping, seed, epsilon=EPSILON):
+    """
+    Returns a LocalEstimate of the personalized PageRank of LinkGraph
+    `graph` for a surfer who always jumps back to page number `seed`,
+    as personalized_ranks would compute it, by forward push (after
+    Andersen, Chung and Lang).
+
+    The seed starts with all the residual. Pushing a page keeps
+    (1 - damping) of its residual as rank and passes the rest on
+    equally along its links, or back to the seed from a dangling page.
+    Pages are pushed until none has a residual over `epsilon` times its
+    link count. Each push costs the page's link count and removes at
+    least (1 - damping) * epsilon of it from the residual, so the whole
+    run costs O(1 / ((1 - damping) * epsilon)) however large the graph
+    is, and only pages near the seed are ever read.
+    """
+    out_offsets = graph.out_offsets
+    out_degrees = graph.out_degrees
+    targets = graph.targets
+
+    ranks = {}
+    residuals = {seed: 1.0}
+    queue = deque([seed])
+    queued = {seed}
+    pushes = 0
+    while queue:
+        u = queue.popleft()
+        queued.discard(u)
+        r = residuals[u]
+        degree = out_degrees[u]
+        if r <= epsilon * max(degree, 1):
+            continue
+        pushes += 1
+        ranks[u] = ranks.get(u, 0.0) + (1 - damping) * r
+        residuals[u] = 0.0
+        if degree:
+            share = damping * r / degree
+            receivers = targets[out_offsets[u]:out_offsets[u + 1]]
+        else:
+            share = damping * r
+            receivers = (seed,)
+        for v in receivers:
+            residual = residuals.get(v, 0.0) + share
+            residuals[v] = residual
+            if v not in queued and residual > epsilon * max(out_degrees[v], 1):
+                queue.append(v)
+                queued.add(v)
+    return LocalEstimate(
+        ranks, sum(residuals.values()), pushes, len(residuals)
+    )
@@ -0,0 +1,286 @@
+import argparse
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+
+from crawler import page_links
+from solvers import TOLERANCE, SolveStats
+
+# Bump whenever the layout of the edge file changes
+VERSION = 1
+
+MAGIC = b"PRLINKS\0"
+FILENAME = "pagerank.edges"
+
+# The fixed part of the header: magic, version, length of the JSON header
+PREAMBLE = struct.Struct("<8sII")
+
+# Edges sorted in memory at a time while building the edge file
+RUN_EDGES = 1 << 20
+
+# Edges read from the edge file at a time while iterating
+BLOCK_EDGES = 1 << 16
+
+# Keys read from each sorted run at a time while merging
+MERGE_KEYS = 1 << 14
+
+DAMPING = 0.85
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rank the pages of a corpus too large for memory, "
+                    "streaming its links from an edge file on disk."
+    )
+    parser.add_argument("corpus")
+    parser.add_argument(
+        "-o", "--output",
+        help=f"where to write the edge file (default: {FILENAME} in the "
+             "corpus directory)"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=TOLERANCE,
+        help=f"L1 tolerance to iterate to (default: {TOLERANCE})"
+    )
+    parser.add_argument(
+        "--block-edges", type=int, default=BLOCK_EDGES,
+        help=f"edges to read at a time (default: {BLOCK_EDGES})"
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="report how long building and iterating took"
+    )
+    args = parser.parse_args()
+
+    path = args.output or os.path.join(args.corpus, FILENAME)
+    start = time.perf_counter()
+    build_edge_file(args.corpus, path)
+    built = time.perf_counter() - start
+
+    stats = SolveStats()
+    with EdgeFile(path) as edges:
+        ranks = stream_pagerank(
+            edges, DAMPING, args.tolerance, args.block_edges, stats
+        )
+        pages = edges.pages
+    print(f"PageRank Results from Streaming")
+    for page, rank in sorted(zip(pages, ranks)):
+        print(f"  {page}: {rank:.4f}")
+    if args.stats:
+        print(f"Edge file: {len(pages)} pages, {edges.edge_count} links, "
+              f"built in {built:.3f}s")
+        print(f"Iteration: {stats}")
+
+
+class EdgeFile():
+    """
+    A memory-mapped edge file written by build_edge_file.
+
+    Pages are numbered in sorted order of their names, as in a
+    LinkGraph. `out_degrees` is an array of each page's link count;
+    the links themselves are (target, source) pairs of page numbers,
+    sorted by target and then source, and are only ever read a block
+    at a time from the mapped file (see blocks), so the operating
+    system keeps as few of them in memory as it likes.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, header_length = PREAMBLE.unpack_from(self._data)
+        except struct.error:
+            raise ValueError(f"not an edge file: {path}")
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} edge file: {path}")
+        header = json.loads(
+            self._data[PREAMBLE.size:PREAMBLE.size + header_length]
+        )
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"edge file has the wrong byte order: {path}")
+
+        self.pages = header["pages"]
+        self.edge_count = header["edges"]
+        start = _align(PREAMBLE.size + header_length)
+        view = memoryview(self._data)
+        n = len(self.pages)
+        self.out_degrees = view[start:start + 4 * n].cast("i")
+        start = _align(start + 4 * n)
+        self._edges = view[start:start + 8 * self.edge_count].cast("i")
+
+    def page_count(self):
+        return len(self.pages)
+
+    def blocks(self, size=BLOCK_EDGES):
+        """
+        Yields the edges `size` at a time, as (targets, sources) pairs of
+        memoryviews into the mapped file.
+        """
+        for first in range(0, self.edge_count, size):
+            block = self._edges[2 * first:2 * min(first + size,
+                                                  self.edge_count)]
+            yield block[0::2], block[1::2]
+
+    def close(self):
+        self.out_degrees.release()
+        self._edges.release()
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_edge_file(directory, path=None, run_edges=RUN_EDGES):
+    """
+    Writes the links between the .html pages in `directory` to an edge
+    file at `path` (default: in `directory`) and returns its path.
+
+    Pages are parsed one at a time and their links collected as 64-bit
+    (target, source) keys; every `run_edges` of them are sorted and
+    written to a temporary run file, and the runs are then merged into
+    the edge file. Only the page names, the link counts and one run are
+    ever held in memory.
+    """
+    if path is None:
+        path = os.path.join(directory, FILENAME)
+    pages = sorted(
+        entry.name for entry in os.scandir(directory)
+        if entry.name.endswith(".html") and entry.is_file()
+    )
+    numbers = {page: i for i, page in enumerate(pages)}
+    out_degrees = array("i", [0]) * len(pages)
+
+    with tempfile.TemporaryDirectory(
+        dir=os.path.dirname(os.path.abspath(path))
+    ) as scratch:
+        runs = []
+        keys = array("q")
+        edge_count = 0
+        for source, page in enumerate(pages):
+            for link in page_links(os.path.join(directory, page)):
+                target = numbers.get(link)
+                if target is None or target == source:
+                    continue
+                keys.append(target << 32 | source)
+                out_degrees[source] += 1
+            if len(keys) >= run_edges:
+                edge_count += len(keys)
+                runs.append(_write_run(scratch, len(runs), keys))
+                keys = array("q")
+        if keys or not runs:
+            edge_count += len(keys)
+            runs.append(_write_run(scratch, len(runs), keys))
+
+        header = json.dumps({
+            "byteorder": sys.byteorder,
+            "pages": pages,
+            "edges": edge_count,
+        }).encode("utf-8")
+        with open(path + ".tmp", "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+            f.write(header)
+            f.seek(_align(PREAMBLE.size + len(header)))
+            out_degrees.tofile(f)
+            f.seek(_align(f.tell()))
+            _merge_runs(runs, f)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def _write_run(directory, number, keys):
+    """
+    Sorts `keys` and writes them to run file `number` in `directory`.
+    """
+    run = os.path.join(directory, f"run{number}")
+    with open(run, "wb") as f:
+        array("q", sorted(keys)).tofile(f)
+    return run
+
+
+def _read_run(run):
+    """
+    Yields the keys of a run file, reading MERGE_KEYS at a time.
+    """
+    with open(run, "rb") as f:
+        while True:
+            keys = array("q")
+            try:
+                keys.fromfile(f, MERGE_KEYS)
+            except EOFError:
+                # fromfile still appends what there was
+                pass
+            if not keys:
+                return
+            yield from keys
+
+
+def _merge_runs(runs, f):
+    """
+    Merges sorted run files into `f` as (target, source) int pairs.
+    """
+    pairs = array("i")
+    for key in heapq.merge(*map(_read_run, runs)):
+        pairs.append(key >> 32)
+        pairs.append(key & 0xFFFFFFFF)
+        if len(pairs) >= 2 * MERGE_KEYS:
+            pairs.tofile(f)
+            pairs = array("i")
+    pairs.tofile(f)
+
+
+def stream_pagerank(edges, damping, tolerance=TOLERANCE,
+                    block_edges=BLOCK_EDGES, stats=None):
+    """
+    Returns the PageRank vector of an EdgeFile, by power iteration as
+    solvers.power_iteration does, stopping once a step changes the
+    ranks by no more than `tolerance` in L1 norm.
+
+    Each step streams the edges through in blocks of `block_edges`, so
+    memory holds a few vectors of one number per page but never the
+    links. The edges are sorted by target, so each page's in-links are
+    added up in the same order as a LinkGraph's and the results match
+    iterate_pagerank's.
+    """
+    if stats is None:
+        stats = SolveStats()
+    stats.method = "streaming"
+    n = edges.page_count()
+    out_degrees = edges.out_degrees
+    dangling = [j for j, degree in enumerate(out_degrees) if degree == 0]
+
+    ranks = [1 / n] * n
+    while True:
+        began = time.perf_counter()
+        shares = [
+            rank / degree if degree else 0.0
+            for rank, degree in zip(ranks, out_degrees)
+        ]
+        inflow = [0] * n
+        for targets, sources in edges.blocks(block_edges):
+            for target, source in zip(targets, sources):
+                inflow[target] += shares[source]
+        base = (1 - damping) / n + damping * sum(
+            ranks[j] for j in dangling
+        ) / n
+        new_ranks = [base + damping * flow for flow in inflow]
+        change = sum(abs(a - b) for a, b in zip(new_ranks, ranks))
+        ranks = new_ranks
+        stats.record(change, time.perf_counter() - began)
+        if change <= tolerance:
+            return ranks
+
+
+def _align(position):
+    return (position + 7) & ~7
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,111 @@
-import os
+import argparse
 import random
-import re
-import sys
+
+import crawler
+from incremental import update_ranks
+from linkgraph import build_link_graph
+from personalized import personalized_ranks, teleport_vectors
+from sampling import parallel_sample, sample_ranks
+from solvers import METHODS, TOLERANCE, SolveStats, solve
 
 DAMPING = 0.85
 SAMPLES = 10000
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
-    print(f"PageRank Results from Sampling (n = {SAMPLES})")
-    for page in sorted(ranks):
-        print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
+    parser = argparse.ArgumentParser(
+        description="Rank the pages of a corpus by sampling and by iteration."
+    )
+    parser.add_argument("corpus")
+    parser.add_argument(
+        "-n", "--samples", type=int, default=SAMPLES,
+        help=f"number of pages to sample (default: {SAMPLES})"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=1,
+        help="sample in this many processes, each batch with its own "
+             "seeded generator, and report 95%% confidence intervals"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="parse every page, ignoring and not writing the link cache"
+    )
+    parser.add_argument(
+        "--seed", type=int,
+        help="seed for sampling, so runs can be repeated"
+    )
+    parser.add_argument(
+        "--method", choices=sorted(METHODS), default="power",
+        help="how to iterate (default: power)"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=TOLERANCE,
+        help="stop iterating once an iteration changes the ranks by no "
+             f"more than this in all (default: {TOLERANCE})"
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="report how iteration converged"
+    )
+    parser.add_argument(
+        "--personalize", action="append", metavar="PAGE", default=[],
+        help="also rank the pages for a surfer who always jumps back to "
+             "PAGE (may be repeated; all are solved together)"
+    )
+    args = parser.parse_args()
+    corpus = crawl(args.corpus, cache=not args.no_cache)
+    if args.workers > 1 or args.seed is not None:
+        graph = build_link_graph(corpus)
+        estimate = parallel_sample(
+            graph, DAMPING, args.samples, args.workers,
+            seed=0 if args.seed is None else args.seed
+        )
+        print(f"PageRank Results from Sampling (n = {args.samples}, "
+              f"{estimate.batches} batches)")
+        for i, page in enumerate(graph.pages):
+            print(f"  {page}: {estimate.ranks[i]:.4f} "
+                  f"± {estimate.margins[i]:.4f}")
+    else:
+        ranks = sample_pagerank(corpus, DAMPING, args.samples)
+        print(f"PageRank Results from Sampling (n = {args.samples})")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+    stats = SolveStats()
+    ranks = iterate_pagerank(
+        corpus, DAMPING, args.method, args.tolerance, stats
+    )
     print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
-
-
-def crawl(directory):
+    if args.stats:
+        print(f"Iteration: {stats}")
+        for i, residual in enumerate(stats.residuals, 1):
+            print(f"  {i}: residual {residual:.2e}, "
+                  f"{stats.times[i - 1] * 1000:.2f}ms")
+    if args.personalize:
+        try:
+            results = personalized_pagerank(
+                corpus, DAMPING, args.personalize, args.tolerance
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        for seed, ranks in zip(args.personalize, results):
+            print(f"PageRank Results Personalized to {seed}")
+            for page in sorted(ranks):
+                print(f"  {page}: {ranks[page]:.4f}")
+
+
+def crawl(directory, cache=False, workers=None):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
-    """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
-
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
 
-    return pages
+    Pages are parsed in parallel by crawler.crawl; with `cache`, the
+    links found are kept in a file in `directory` and only pages that
+    have changed since are parsed again.
+    """
+    return crawler.crawl(directory, cache=cache, workers=workers)
 
 
 def transition_model(corpus, page, damping_factor):
@@ -87,26 +147,12 @@ def sample_pagerank(corpus, damping_factor, n):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
-    """
-    page_ranks = dict()
-
-    #initialize all probabilities
-    for key in corpus.keys():
-        page_ranks.update({key : float(1 - damping_factor) / len(corpus.keys())})
-
-    #All of the pages should have the same probability on the first sample
-    selected_page = None
 
-    #Sample n number of times
-    for i in range(n):
-        #surfer chooses random page based off probabilities
-        model = transition_model(corpus, selected_page, damping_factor)
-        selected_key = sample_distribution(model)
-
-        #update the chosen page to the page_ranks
-        page_ranks[selected_key] += float(damping_factor) / n
-
-    return page_ranks
+    Samples are drawn straight from a LinkGraph (see sampling.py), so
+    each one costs the same however many pages the corpus has.
+    """
+    graph = build_link_graph(corpus)
+    return graph.ranks(sample_ranks(graph, damping_factor, n))
 
 
 def sample_distribution(probability_distribution):
@@ -143,7 +189,8 @@ def sample_distribution(probability_distribution):
             i += 1
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, method="power",
+                     tolerance=TOLERANCE, stats=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -151,42 +198,58 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
-    """
-    #initalize page ranks
-    page_ranks = dict()
-    for key in corpus.keys():
-        page_ranks.update({key : float(1) / len(corpus.keys())})
-
-    while True:
-        #Make a copy of old values to use in comparison later
-        old_page_ranks = page_ranks.copy()
-
-        #Calculate page rank
-        for key in corpus.keys():
-            page_ranks_value = float(1 - damping_factor) / len(corpus.keys())
 
-            for other_key in corpus.keys():
-                if len(corpus[other_key]) == 0:
-                    page_ranks_value += float(damping_factor) * old_page_ranks[other_key] / len(corpus.keys())
+    The corpus is converted to a LinkGraph once, so that each update
+    is one pass over the links (see solvers.py) rather than a scan of
+    every pair of pages.
 
-                elif corpus[other_key].issuperset({key}):
-                    page_ranks_value += float(damping_factor) * old_page_ranks[other_key] / len(corpus[other_key])
+    `method` picks the solver (one of solvers.METHODS), which stops once
+    an iteration changes the values by no more than `tolerance` in all.
+    If `stats` is a SolveStats, it records the iterations and residuals.
+    """
+    graph = build_link_graph(corpus)
+    ranks = solve(
+        graph, damping_factor, method, tolerance=tolerance, stats=stats
+    )
+    return graph.ranks(ranks)
 
-            page_ranks[key] = page_ranks_value
 
-        #break out of while loop if no page changed by > 0.001
-        break_loop = True
+def personalized_pagerank(corpus, damping_factor, seeds,
+                          tolerance=TOLERANCE, stats=None):
+    """
+    Return a dictionary of personalized PageRank values for each of
+    `seeds`, in the same order. A seed is a page, which the surfer then
+    always jumps back to instead of to a random page, or a dictionary
+    mapping pages to how likely the surfer is to jump to each.
 
-        for key in corpus.keys():
-            difference = old_page_ranks[key] - page_ranks[key]
-            if difference < -0.001 or difference > 0.001:
-                break_loop = False
-                break
+    Every seed is solved in the same pass over the links (see
+    personalized.py); seeds whose values have converged drop out early.
+    """
+    graph = build_link_graph(corpus)
+    results = personalized_ranks(
+        graph, damping_factor, teleport_vectors(graph, seeds), tolerance,
+        stats
+    )
+    return [graph.ranks(ranks) for ranks in results]
 
-        if break_loop:
-            break
 
-    return page_ranks
+def update_pagerank(corpus, damping_factor, previous, delta=None):
+    """
+    Return PageRank values for each page of `corpus` after it changed,
+    given the values `previous` from before the change, as returned by
+    iterate_pagerank.
+
+    Iteration starts from the previous values instead of from scratch.
+    If `delta`, the LinkDelta that was applied (see incremental.py), is
+    given and only changed links, only the pages the change reaches are
+    updated, unless it reaches so far that iterating over every page is
+    cheaper.
+    """
+    graph = build_link_graph(corpus)
+    ranks = update_ranks(
+        graph, damping_factor, previous, delta, local=delta is not None
+    )
+    return graph.ranks(ranks)
 
 
 if __name__ == "__main__":
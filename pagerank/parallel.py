@@ -0,0 +1,221 @@
+import argparse
+import multiprocessing
+import os
+import time
+from array import array
+from bisect import bisect_left
+from multiprocessing import shared_memory
+
+from solvers import TOLERANCE, SolveStats, l1_distance, power_iteration
+from synthetic import random_link_graph
+
+DAMPING = 0.85
+
+# Bytes in one double
+DOUBLE = array("d").itemsize
+
+# The graph being solved and the shared memory the workers exchange
+# ranks through, inherited by forked workers
+_worker_graph = None
+_worker_memory = None
+
+
+def partition(graph, blocks):
+    """
+    Splits the pages of `graph` into `blocks` runs of consecutive page
+    numbers with about the same number of in-links plus pages each, and
+    returns the page number each run starts at, followed by the page
+    count. A block's rows of the link matrix are its pages' in-links,
+    so the blocks cost about the same to update.
+    """
+    n = graph.page_count()
+    offsets = graph.offsets
+    work = offsets[n] + n
+    bounds = [0]
+    for b in range(1, blocks):
+        # Pages before page p cost offsets[p] + p
+        p = bisect_left(range(n), work * b / blocks,
+                        key=lambda p: offsets[p] + p)
+        bounds.append(max(p, bounds[-1]))
+    bounds.append(n)
+    return bounds
+
+
+def parallel_pagerank(graph, damping, workers=None, tolerance=TOLERANCE,
+                      stats=None):
+    """
+    Returns the PageRank vector of LinkGraph `graph`, by power iteration
+    as solvers.power_iteration does, with its pages split into one
+    block per worker process (default: one per CPU).
+
+    Each worker updates only its block's ranks, reading every page's
+    share of rank from shared memory. An iteration has two phases, each
+    ended by a barrier: first every worker writes its pages' shares and
+    its part of the dangling rank, then every worker writes its pages'
+    new ranks and its part of the L1 change. All workers then see the
+    same total change, so they all stop at the same iteration.
+
+    Without fork, or with one worker, this is power_iteration.
+    """
+    global _worker_graph, _worker_memory
+    if stats is None:
+        stats = SolveStats()
+    if workers is None:
+        workers = os.cpu_count()
+    n = graph.page_count()
+    workers = max(1, min(workers, n))
+    if workers == 1 or "fork" not in multiprocessing.get_all_start_methods():
+        return power_iteration(graph, damping, tolerance=tolerance,
+                               stats=stats)
+    stats.method = f"parallel ({workers} workers)"
+
+    bounds = partition(graph, workers)
+    # Two rank vectors to swap between, the shares, and for each worker
+    # its dangling rank and change
+    memory = shared_memory.SharedMemory(
+        create=True, size=DOUBLE * (3 * n + 2 * workers)
+    )
+    context = multiprocessing.get_context("fork")
+    barrier = context.Barrier(workers)
+    reports = context.SimpleQueue()
+    _worker_graph = graph
+    _worker_memory = memory
+    try:
+        vectors = memory.buf.cast("d")
+        vectors[:n] = array("d", [1 / n]) * n
+        del vectors
+        processes = [
+            context.Process(
+                target=_worker_solve,
+                args=(w, bounds, damping, tolerance, barrier, reports)
+            )
+            for w in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        report = reports.get()
+        for process in processes:
+            process.join()
+        if report is None:
+            raise RuntimeError("a PageRank worker failed")
+        residuals, times, final = report
+
+        for residual, seconds in zip(residuals, times):
+            stats.record(residual, seconds)
+        vectors = memory.buf.cast("d")
+        ranks = vectors[final * n:(final + 1) * n].tolist()
+        del vectors
+        return ranks
+    finally:
+        _worker_graph = None
+        _worker_memory = None
+        memory.close()
+        memory.unlink()
+
+
+def _worker_solve(w, bounds, damping, tolerance, barrier, reports):
+    """
+    Runs worker `w`'s part of parallel_pagerank on its block of pages,
+    bounds[w] to bounds[w + 1]. Worker 0 reports the residual and time
+    of every iteration, and which rank vector holds the result; a worker
+    that fails breaks the barrier, so the others stop too, and reports
+    None.
+    """
+    try:
+        report = _worker_iterate(w, bounds, damping, tolerance, barrier)
+    except BaseException:
+        barrier.abort()
+        reports.put(None)
+        raise
+    if w == 0:
+        reports.put(report)
+
+
+def _worker_iterate(w, bounds, damping, tolerance, barrier):
+    graph = _worker_graph
+    n = graph.page_count()
+    workers = len(bounds) - 1
+    first, last = bounds[w], bounds[w + 1]
+    offsets = graph.offsets
+    sources = graph.sources
+    out_degrees = graph.out_degrees[first:last]
+    dangling = [j for j in graph.dangling if first <= j < last]
+
+    # The shared memory was mapped before the fork, so it is shared
+    vectors = _worker_memory.buf.cast("d")
+    rank_vectors = (vectors[:n], vectors[n:2 * n])
+    shares = vectors[2 * n:3 * n]
+    stranded = vectors[3 * n:3 * n + workers]
+    changes = vectors[3 * n + workers:]
+    share = shares.__getitem__
+
+    residuals = []
+    times = []
+    current = 0
+    while True:
+        began = time.perf_counter()
+        ranks = rank_vectors[current]
+        shares[first:last] = array("d", [
+            rank / degree if degree else 0.0
+            for rank, degree in zip(ranks[first:last], out_degrees)
+        ])
+        stranded[w] = sum(ranks[j] for j in dangling)
+        barrier.wait()
+
+        base = (1 - damping) / n + damping * sum(stranded) / n
+        new_ranks = array("d", [
+            base
+            + damping * sum(map(share, sources[offsets[i]:offsets[i + 1]]))
+            for i in range(first, last)
+        ])
+        rank_vectors[1 - current][first:last] = new_ranks
+        changes[w] = l1_distance(new_ranks, ranks[first:last])
+        # Nobody reads the next shares or writes the next changes until
+        # everyone is past the following barrier, so one is enough
+        barrier.wait()
+
+        change = sum(changes)
+        current = 1 - current
+        residuals.append(change)
+        times.append(time.perf_counter() - began)
+        if change <= tolerance:
+            return residuals, times, current
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time block-parallel PageRank on a synthetic corpus."
+    )
+    parser.add_argument("-p", "--pages", type=int, default=1000000)
+    parser.add_argument("-d", "--degree", type=int, default=8)
+    parser.add_argument(
+        "-w", "--workers", type=int, nargs="+", default=[1, 2, 4, 8],
+        help="worker counts to time (default: 1 2 4 8)"
+    )
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = random_link_graph(args.pages, args.degree)
+    print(f"Generated {graph.page_count()} pages, {graph.link_count()} "
+          f"links in {time.perf_counter() - start:.1f}s "
+          f"({os.cpu_count()} CPUs)")
+
+    baseline = reference = None
+    for workers in args.workers:
+        stats = SolveStats()
+        start = time.perf_counter()
+        ranks = parallel_pagerank(
+            graph, DAMPING, workers, args.tolerance, stats
+        )
+        seconds = time.perf_counter() - start
+        if baseline is None:
+            baseline, reference = seconds, ranks
+        print(f"  {workers:>3} workers: {seconds:8.2f}s, "
+              f"{stats.iterations()} iterations, "
+              f"speedup {baseline / seconds:.2f}x, "
+              f"L1 difference {l1_distance(ranks, reference):.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import time
+
+from solvers import TOLERANCE, SolveStats
+
+
+class BatchStats(SolveStats):
+    """
+    SolveStats for a batch of personalized solves. Each iteration's
+    residual is the largest L1 change of any column still being solved,
+    `computed` counts those columns, and converged[c] is the iteration
+    after which column c stopped.
+    """
+    def __init__(self):
+        super().__init__()
+        self.converged = []
+
+
+def teleport_vectors(graph, seeds):
+    """
+    Returns a teleport vector for each of `seeds`, for
+    personalized_ranks. A seed is a page name, to jump only to that
+    page, or a dictionary mapping page names to weights, to jump to
+    those pages in proportion.
+    """
+    n = graph.page_count()
+    numbers = graph.numbers
+    vectors = []
+    for seed in seeds:
+        weights = {seed: 1} if isinstance(seed, str) else seed
+        vector = [0.0] * n
+        for page, weight in weights.items():
+            if page not in numbers:
+                raise ValueError(f"not in corpus: {page}")
+            vector[numbers[page]] = weight
+        vectors.append(vector)
+    return vectors
+
+
+def personalized_ranks(graph, damping, teleports, tolerance=TOLERANCE,
+                       stats=None):
+    """
+    Returns the personalized PageRank vector of LinkGraph `graph` for
+    each vector in `teleports`: the surfer who does not follow a link,
+    or is on a dangling page, jumps to page i with probability
+    proportional to teleport[i] instead of to any page alike.
+
+    All of them are solved together by power iteration on a matrix with
+    a row per page and a column per teleport vector, so each iteration
+    reads the links once for every column rather than once per column.
+    A column whose L1 change falls to `tolerance` is taken out of the
+    matrix, and later iterations only carry the columns still moving.
+    """
+    if stats is None:
+        stats = BatchStats()
+    stats.method = "personalized"
+    n = graph.page_count()
+    offsets = graph.offsets
+    sources = graph.sources
+    out_degrees = graph.out_degrees
+    dangling = graph.dangling
+
+    columns = []
+    for teleport in teleports:
+        if len(teleport) != n:
+            raise ValueError(f"teleport vector is not of length {n}")
+        total = sum(teleport)
+        if total <= 0 or min(teleport) < 0:
+            raise ValueError("teleport vector has no positive weight")
+        columns.append([weight / total for weight in teleport])
+    results = [None] * len(columns)
+    stats.converged = [None] * len(columns)
+
+    # Row i holds page i's value in each active column
+    active = list(range(len(columns)))
+    jumps = [list(row) for row in zip(*columns)]
+    ranks = [list(row) for row in jumps]
+    while active:
+        began = time.perf_counter()
+        width = len(active)
+        zeros = [0.0] * width
+        shares = [
+            [rank / degree for rank in row] if degree else zeros
+            for row, degree in zip(ranks, out_degrees)
+        ]
+        share = shares.__getitem__
+
+        # Each column's teleport term scales with its dangling rank
+        stranded = [sum(column) for column in zip(*map(ranks.__getitem__,
+                                                       dangling))] or zeros
+        scales = [(1 - damping) + damping * d for d in stranded]
+
+        new_ranks = []
+        for i in range(n):
+            inflow = [
+                sum(column) for column in
+                zip(*map(share, sources[offsets[i]:offsets[i + 1]]))
+            ] or zeros
+            new_ranks.append([
+                scale * jump + damping * flow
+                for scale, jump, flow in zip(scales, jumps[i], inflow)
+            ])
+        changes = [
+            sum(abs(a - b) for a, b in zip(new, old))
+            for new, old in zip(zip(*new_ranks), zip(*ranks))
+        ]
+        ranks = new_ranks
+        stats.record(max(changes), time.perf_counter() - began, width)
+
+        keep = [p for p, change in enumerate(changes) if change > tolerance]
+        if len(keep) < width:
+            for p, column in enumerate(zip(*ranks)):
+                if changes[p] <= tolerance:
+                    total = sum(column)
+                    results[active[p]] = [rank / total for rank in column]
+                    stats.converged[active[p]] = stats.iterations()
+            active = [active[p] for p in keep]
+            ranks = [[row[p] for p in keep] for row in ranks]
+            jumps = [[row[p] for p in keep] for row in jumps]
+    return results
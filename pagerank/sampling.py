@@ -0,0 +1,205 @@
+import math
+import multiprocessing
+import os
+import random
+from array import array
+
+
+def sample_visits(graph, damping, n, walkers=1, rng=random):
+    """
+    Runs `walkers` independent random surfers over a LinkGraph for `n`
+    samples in all, advancing every walker one click per round, and
+    returns an array counting how many samples landed on each page.
+    Each walker's first page is chosen uniformly at random.
+
+    The transition model never needs building: with probability
+    `damping` the surfer follows one of the page's links, all equally
+    likely, and otherwise (or from a dangling page) jumps to any page,
+    all equally likely. Both are uniform choices, so a step is one
+    random number and one array lookup whatever the size of the corpus.
+    """
+    count = graph.page_count()
+    out_offsets = graph.out_offsets
+    out_degrees = graph.out_degrees
+    targets = graph.targets
+    draw = rng.random
+
+    visits = array("q", [0]) * count
+    positions = [int(draw() * count) for _ in range(min(walkers, n))]
+    for page in positions:
+        visits[page] += 1
+    remaining = n - len(positions)
+    while remaining > 0:
+        active = min(len(positions), remaining)
+        for w in range(active):
+            page = positions[w]
+            degree = out_degrees[page]
+            u = draw()
+            if degree and u < damping:
+                # u / damping is itself uniform on [0, 1)
+                page = targets[out_offsets[page] + int(u / damping * degree)]
+            else:
+                page = int(draw() * count)
+            positions[w] = page
+            visits[page] += 1
+        remaining -= active
+    return visits
+
+
+def sample_ranks(graph, damping, n, walkers=1, rng=random):
+    """
+    Returns the PageRank vector of a LinkGraph estimated as the share of
+    `n` samples (see sample_visits) that landed on each page.
+    """
+    return [v / n for v in sample_visits(graph, damping, n, walkers, rng)]
+
+
+class SampleEstimate():
+    """
+    PageRank estimated from samples drawn in independent batches.
+
+    ranks[i] is the share of all samples that landed on page i and
+    margins[i] the half-width of its confidence interval at level
+    `confidence`, from the spread of the per-batch estimates (the method
+    of batch means, which allows for successive samples of one walk
+    being correlated). Sampling more shrinks margins by the square root.
+    """
+    def __init__(self, ranks, margins, samples, batches, confidence):
+        self.ranks = ranks
+        self.margins = margins
+        self.samples = samples
+        self.batches = batches
+        self.confidence = confidence
+
+    def interval(self, i):
+        return (self.ranks[i] - self.margins[i],
+                self.ranks[i] + self.margins[i])
+
+    def max_margin(self):
+        return max(self.margins, default=0.0)
+
+
+# The graph being sampled, inherited by forked workers
+_worker_graph = None
+
+
+def _worker_batch(job):
+    batch, size, damping, seed, walkers = job
+    return sample_visits(
+        _worker_graph, damping, size, walkers, batch_random(seed, batch)
+    )
+
+
+def batch_random(seed, batch):
+    """
+    Returns the random generator for one batch. Every batch has its own
+    stream derived from the seed and batch number alone, so results do
+    not depend on how many workers ran the batches or in what order.
+    """
+    return random.Random(f"{seed}:{batch}")
+
+
+def parallel_sample(graph, damping, n, workers=None, seed=0, batches=None,
+                    walkers=1, confidence=0.95):
+    """
+    Estimates the PageRank vector of a LinkGraph from `n` samples split
+    into `batches` (default: four per worker, at least 16) of nearly
+    equal size, run by `workers` processes (default: one per CPU).
+    Returns a SampleEstimate.
+
+    Visit counts are merged as integers, so the same seed gives the same
+    estimate whatever the number of workers.
+    """
+    global _worker_graph
+    if workers is None:
+        workers = os.cpu_count()
+    if batches is None:
+        batches = max(16, 4 * workers)
+    batches = max(2, min(batches, n))
+    jobs = [
+        (batch, n // batches + (batch < n % batches), damping, seed, walkers)
+        for batch in range(batches)
+    ]
+
+    count = graph.page_count()
+    totals = [0] * count
+    squares = [0] * count
+
+    def add(visits):
+        for i, v in enumerate(visits):
+            if v:
+                totals[i] += v
+                squares[i] += v * v
+
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        _worker_graph = graph
+        try:
+            context = multiprocessing.get_context("fork")
+            with context.Pool(min(workers, batches)) as pool:
+                for visits in pool.imap_unordered(_worker_batch, jobs):
+                    add(visits)
+        finally:
+            _worker_graph = None
+    else:
+        for batch, size, _, _, _ in jobs:
+            add(sample_visits(
+                graph, damping, size, walkers, batch_random(seed, batch)
+            ))
+
+    # Batch b's estimate for page i is v_b / m with m = n / batches; the
+    # estimate's variance is that of the batch estimates over batches,
+    # itself estimated from only `batches` of them, hence Student's t
+    t = student_t(confidence, batches - 1)
+    m = n / batches
+    ranks = []
+    margins = []
+    for total, square in zip(totals, squares):
+        ranks.append(total / n)
+        spread = max(0, square - total * total / batches) / (batches - 1)
+        margins.append(t * (spread / batches) ** 0.5 / m)
+    return SampleEstimate(ranks, margins, n, batches, confidence)
+
+
+def student_t(confidence, df):
+    """
+    Returns the t for which a Student's t variable with `df` (a whole
+    number) degrees of freedom lies between -t and t with probability
+    `confidence`: 12.71 for 95% and 1 degree of freedom, 2.13 for 15,
+    tending to the normal 1.96.
+
+    The statistics module has no t distribution, but for whole degrees
+    of freedom its central probability has a closed form (Abramowitz
+    and Stegun 26.7.3-4), which is inverted by bisection.
+    """
+    low, high = 0.0, 1.0
+    while _t_central(high, df) < confidence:
+        low, high = high, 2 * high
+    for _ in range(100):
+        middle = (low + high) / 2
+        if _t_central(middle, df) < confidence:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+def _t_central(t, df):
+    """
+    Returns the probability that a Student's t variable with `df`
+    degrees of freedom lies between -t and t.
+    """
+    theta = math.atan(t / math.sqrt(df))
+    cos2 = math.cos(theta) ** 2
+    if df % 2:
+        term = total = 0.0 if df == 1 else 1.0
+        for k in range(3, df - 1, 2):
+            term *= cos2 * (k - 1) / k
+            total += term
+        return 2 / math.pi * (
+            theta + math.sin(theta) * math.cos(theta) * total
+        )
+    term = total = 1.0
+    for k in range(2, df - 1, 2):
+        term *= cos2 * (k - 1) / k
+        total += term
+    return math.sin(theta) * total
@@ -0,0 +1,342 @@
+import operator
+import time
+
+# A solve stops once an iteration changes the ranks by no more than this
+# in all (the L1 norm of the change)
+TOLERANCE = 0.001
+
+# The fewest power steps aitken() takes between extrapolations
+AITKEN_PERIOD = 3
+
+# aitken() extrapolates once two successive ratios between changes are
+# within this fraction of each other
+AITKEN_SETTLED = 0.01
+
+# How many iterations adaptive() takes between full steps
+ADAPTIVE_PERIOD = 10
+
+
+class SolveStats():
+    """
+    How a solve converged: the method used and, for each iteration, the
+    L1 norm of the change it made (its residual) and the seconds it
+    took. For the adaptive method, `computed` counts the pages each
+    iteration recomputed.
+    """
+    def __init__(self):
+        self.method = None
+        self.residuals = []
+        self.times = []
+        self.computed = []
+
+    def iterations(self):
+        return len(self.residuals)
+
+    def elapsed(self):
+        return sum(self.times)
+
+    def record(self, residual, seconds, computed=None):
+        self.residuals.append(residual)
+        self.times.append(seconds)
+        if computed is not None:
+            self.computed.append(computed)
+
+    def __str__(self):
+        iterations = self.iterations()
+        last = self.residuals[-1] if iterations else 0.0
+        per_iteration = self.elapsed() / iterations if iterations else 0.0
+        return (
+            f"{self.method}: {iterations} iterations, "
+            f"residual {last:.2e}, {self.elapsed():.3f}s "
+            f"({per_iteration * 1000:.2f}ms per iteration)"
+        )
+
+
+def uniform(graph):
+    """
+    Returns the vector giving every page of `graph` the same rank.
+    """
+    n = graph.page_count()
+    return [1 / n] * n
+
+
+def step(graph, ranks, damping):
+    """
+    One step of power iteration: returns the ranks after the surfer
+    clicks once more. The link matrix is applied as a single pass over
+    the CSR in-links, and the rank of dangling pages is added to every
+    page as one shared term rather than as links to everyone.
+    """
+    n = graph.page_count()
+    offsets = graph.offsets
+    sources = graph.sources
+
+    # What each page passes along each of its links
+    shares = [
+        rank / degree if degree else 0.0
+        for rank, degree in zip(ranks, graph.out_degrees)
+    ]
+    share = shares.__getitem__
+    dangling = sum(ranks[j] for j in graph.dangling)
+    base = (1 - damping) / n + damping * dangling / n
+    return [
+        base + damping * sum(map(share, sources[offsets[i]:offsets[i + 1]]))
+        for i in range(n)
+    ]
+
+
+def l1_distance(a, b):
+    return sum(abs(x - y) for x, y in zip(a, b))
+
+
+def power_iteration(graph, damping, start=None, tolerance=TOLERANCE,
+                    stats=None):
+    """
+    Returns the PageRank vector of `graph`, stepping from `start` (the
+    uniform vector by default) until a step changes the ranks by no more
+    than `tolerance` in L1 norm. Each step costs time in proportion to
+    pages plus links, and a `start` close to the answer, such as the
+    ranks from before a small change to the corpus, needs far fewer.
+    """
+    if stats is None:
+        stats = SolveStats()
+    stats.method = "power"
+    ranks = uniform(graph) if start is None else list(start)
+    while True:
+        began = time.perf_counter()
+        new_ranks = step(graph, ranks, damping)
+        change = l1_distance(new_ranks, ranks)
+        ranks = new_ranks
+        stats.record(change, time.perf_counter() - began)
+        if change <= tolerance:
+            return ranks
+
+
+def gauss_seidel(graph, damping, start=None, tolerance=TOLERANCE,
+                 stats=None):
+    """
+    Like power_iteration, but each page's new rank is used as soon as it
+    is computed, within the same sweep, which usually needs fewer
+    sweeps. The shared dangling term is kept up to date as the ranks of
+    dangling pages change. A sweep does not keep the total at 1, so the
+    ranks are renormalised after each one; otherwise the total would
+    only creep back to 1 by a factor of `damping` a sweep.
+    """
+    if stats is None:
+        stats = SolveStats()
+    stats.method = "gauss-seidel"
+    n = graph.page_count()
+    offsets = graph.offsets
+    sources = graph.sources
+    out_degrees = graph.out_degrees
+    teleport = (1 - damping) / n
+
+    ranks = uniform(graph) if start is None else list(start)
+    while True:
+        began = time.perf_counter()
+        previous = list(ranks)
+        shares = [
+            rank / degree if degree else 0.0
+            for rank, degree in zip(ranks, out_degrees)
+        ]
+        share = shares.__getitem__
+        dangling = sum(ranks[j] for j in graph.dangling)
+        for i in range(n):
+            rank = teleport + damping * (
+                dangling / n
+                + sum(map(share, sources[offsets[i]:offsets[i + 1]]))
+            )
+            degree = out_degrees[i]
+            if degree:
+                shares[i] = rank / degree
+            else:
+                dangling += rank - ranks[i]
+            ranks[i] = rank
+        total = sum(ranks)
+        ranks = [rank / total for rank in ranks]
+        change = l1_distance(ranks, previous)
+        stats.record(change, time.perf_counter() - began)
+        if change <= tolerance:
+            return ranks
+
+
+def aitken(graph, damping, start=None, tolerance=TOLERANCE, stats=None,
+           period=AITKEN_PERIOD):
+    """
+    Power iteration with Aitken extrapolation. Once the ratio between
+    successive changes has settled, the error may be shrinking by that
+    ratio each step along a single direction, and then the ranks can
+    jump to where that geometric series ends (see extrapolate). That
+    cancels the slowest-decaying part of the error in one go, when
+    there is one: corpus2 needs 32 steps instead of 82 to reach 1e-8.
+    Where the slow error goes round cycles of links, as in random
+    graphs, no jump is made and this is power iteration.
+
+    The jump is kept only if the step taken from it changes the ranks
+    by less than a plain step would have; otherwise power iteration
+    carries on as if it had not been tried. Attempts are at least
+    `period` steps apart. Every step taken, including the step from a
+    discarded jump, is recorded as an iteration.
+    """
+    if stats is None:
+        stats = SolveStats()
+    stats.method = "aitken"
+    ranks = uniform(graph) if start is None else list(start)
+    history = [ranks]
+    changes = []
+    since = period
+    while True:
+        began = time.perf_counter()
+        new_ranks = step(graph, ranks, damping)
+        change = l1_distance(new_ranks, ranks)
+        ranks = new_ranks
+        history = history[-2:] + [ranks]
+        changes = changes[-2:] + [change]
+        since += 1
+        stats.record(change, time.perf_counter() - began)
+        if change <= tolerance:
+            return ranks
+        if since < period or len(changes) < 3 or not changes[0]:
+            continue
+        ratio = changes[2] / changes[1]
+        if abs(ratio - changes[1] / changes[0]) > AITKEN_SETTLED * ratio:
+            continue
+
+        since = 0
+        began = time.perf_counter()
+        jump = extrapolate(*history)
+        if jump is None:
+            continue
+        new_ranks = step(graph, jump, damping)
+        jump_change = l1_distance(new_ranks, jump)
+        stats.record(jump_change, time.perf_counter() - began)
+        if jump_change < ratio * change:
+            ranks = new_ranks
+            history = [ranks]
+            changes = []
+            if jump_change <= tolerance:
+                return ranks
+
+
+def extrapolate(x0, x1, x2):
+    """
+    Returns the Aitken extrapolation of three successive iterates along
+    their latest change, or None if the changes do not shrink by one
+    ratio along one direction.
+
+    The ratio is estimated from the two changes as a whole, as the
+    projection of the second onto the first, rather than page by page,
+    where modes decaying at different rates make each page's ratio
+    noisy. Error going round a cycle of links shrinks steadily in size
+    but keeps changing direction; then the projection disagrees with
+    the ratio of the changes' sizes and there is nothing to jump to.
+    Otherwise the ranks move on by ratio / (1 - ratio) times the latest
+    change, the sum of the steps that would follow it.
+    """
+    first = [b - a for a, b in zip(x0, x1)]
+    second = [c - b for b, c in zip(x1, x2)]
+    ratio = sum(map(operator.mul, first, second)) \
+        / sum(map(operator.mul, first, first))
+    size = sum(map(abs, second)) / sum(map(abs, first))
+    if not -1 < ratio < 1 or abs(abs(ratio) - size) > AITKEN_SETTLED * size:
+        return None
+    factor = ratio / (1 - ratio)
+    return [c + factor * d for c, d in zip(x2, second)]
+
+
+def adaptive(graph, damping, start=None, tolerance=TOLERANCE, stats=None,
+             period=ADAPTIVE_PERIOD):
+    """
+    Power iteration that stops recomputing pages once they converge: a
+    page whose rank changed by no more than its share of the tolerance
+    (tolerance / pages) is frozen, and the iterations after only read
+    its rank. Most pages settle long before the slowest ones do, so
+    those iterations are cheaper: what each page passes along its
+    links, and the dangling pages' total, are kept up to date for just
+    the pages recomputed, so an iteration costs time in proportion to
+    the links into them. A full step refreshes every page and picks
+    the pages to freeze afresh every `period` iterations, as soon as
+    every page is frozen, and as soon as an iteration changes the
+    pages still active by no more than `tolerance`; only a full step
+    that changes the ranks by no more than that ends the solve.
+
+    This pays off only where pages converge at very different rates.
+    On random graphs and corpus0-2 they do not. Pages frozen near the
+    end drift while their neighbours settle, so the full step that
+    follows usually finds the solve unfinished. There it is no faster
+    than power_iteration.
+    """
+    if stats is None:
+        stats = SolveStats()
+    stats.method = "adaptive"
+    n = graph.page_count()
+    offsets = graph.offsets
+    sources = graph.sources
+    out_degrees = graph.out_degrees
+    threshold = tolerance / n
+
+    ranks = uniform(graph) if start is None else list(start)
+    active = None
+    change = None
+    since = 0
+    while True:
+        began = time.perf_counter()
+        full = not active or change <= tolerance or since == period
+        since = 0 if full else since + 1
+        if full:
+            shares = [
+                rank / degree if degree else 0.0
+                for rank, degree in zip(ranks, out_degrees)
+            ]
+            dangling = sum(ranks[j] for j in graph.dangling)
+        share = shares.__getitem__
+        base = (1 - damping) / n + damping * dangling / n
+
+        pages = range(n) if full else active
+        new_ranks = []
+        change = 0.0
+        still_active = []
+        for i in pages:
+            rank = base + damping * sum(
+                map(share, sources[offsets[i]:offsets[i + 1]])
+            )
+            difference = abs(rank - ranks[i])
+            change += difference
+            new_ranks.append(rank)
+            if difference > threshold:
+                still_active.append(i)
+        # Only the pages recomputed change what they pass on
+        for i, rank in zip(pages, new_ranks):
+            degree = out_degrees[i]
+            if degree:
+                shares[i] = rank / degree
+            else:
+                dangling += rank - ranks[i]
+            ranks[i] = rank
+        stats.record(change, time.perf_counter() - began, len(pages))
+        active = still_active
+        if full and change <= tolerance:
+            # Frozen pages let the total drift slightly off 1
+            total = sum(ranks)
+            return [rank / total for rank in ranks]
+
+
+# The solvers iterate_pagerank can be asked for by name
+METHODS = {
+    "power": power_iteration,
+    "gauss-seidel": gauss_seidel,
+    "aitken": aitken,
+    "adaptive": adaptive,
+}
+
+
+def solve(graph, damping, method="power", start=None, tolerance=TOLERANCE,
+          stats=None):
+    """
+    Returns the PageRank vector of `graph` found by the solver named
+    `method` (one of METHODS), recording how it converged in `stats`, a
+    SolveStats, if given.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method: {method}")
+    return METHODS[method](graph, damping, start, tolerance, stats)
@@ -0,0 +1,168 @@
+import argparse
+import os
+import random
+from array import array
+
+from linkgraph import LinkGraph, _csr
+
+# How the number of links on a page that has any is distributed
+DISTRIBUTIONS = ("uniform", "poisson", "power-law")
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+    <head>
+        <title>{page}</title>
+    </head>
+    <body>
+        <h1>{page}</h1>
+
+        <div>Links:</div>
+        <ul>
+{items}        </ul>
+    </body>
+</html>
+"""
+
+ITEM = """            <li><a href="{page}.html">{page}</a></li>
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write a random corpus of HTML pages for benchmarking."
+    )
+    parser.add_argument("directory")
+    parser.add_argument("-p", "--pages", type=int, default=1000)
+    parser.add_argument(
+        "-d", "--degree", type=float, default=8,
+        help="mean number of links on a page with links (default: 8)"
+    )
+    parser.add_argument(
+        "--distribution", choices=DISTRIBUTIONS, default="power-law",
+        help="how the number of links varies from page to page "
+             "(default: power-law)"
+    )
+    parser.add_argument(
+        "--dangling", type=float, default=0.1,
+        help="fraction of pages with no links (default: 0.1)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.pages < 2:
+        parser.error("a corpus needs at least 2 pages")
+    if not 0 <= args.dangling <= 1:
+        parser.error("--dangling must be between 0 and 1")
+    if args.degree < 1:
+        parser.error("--degree must be at least 1")
+
+    links = write_corpus(
+        args.directory, args.pages, args.degree, args.distribution,
+        args.dangling, args.seed
+    )
+    print(f"Wrote {args.pages} pages with {links} links to "
+          f"{args.directory}")
+
+
+def random_rows(pages, degree=8, distribution="power-law", dangling=0.1,
+                seed=0):
+    """
+    Yields, for each of `pages` pages in turn, a sorted array of the
+    numbers of the pages it links to.
+
+    A `dangling` fraction of pages has no links. On the others the
+    number of links follows `distribution` (one of DISTRIBUTIONS) with
+    mean about `degree`:
+
+        uniform    between 1 and 2 * degree - 1, all equally likely
+        poisson    1 plus a Poisson count with mean degree - 1
+        power-law  Pareto, with shape 2: most pages have fewer, a few many
+
+    Half the links go to a page chosen uniformly and half follow a power
+    law over the pages, so a few pages gather many in-links as on the
+    web. Links to the page itself and repeated links are dropped.
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"unknown distribution: {distribution}")
+    rng = random.Random(seed)
+    for j in range(pages):
+        if rng.random() < dangling:
+            yield array("i")
+            continue
+        row = set()
+        for _ in range(_link_count(rng, degree, distribution, pages)):
+            if rng.random() < 0.5:
+                i = rng.randrange(pages)
+            else:
+                i = int(pages * rng.random() ** 3)
+            if i != j:
+                row.add(i)
+        yield array("i", sorted(row))
+
+
+def _link_count(rng, degree, distribution, pages):
+    if distribution == "uniform":
+        count = rng.randint(1, max(1, round(2 * degree - 1)))
+    elif distribution == "poisson":
+        # Count arrivals of a unit-rate process before time degree - 1
+        count = 1
+        elapsed = rng.expovariate(1)
+        while elapsed < degree - 1:
+            count += 1
+            elapsed += rng.expovariate(1)
+    else:
+        # A Pareto variate with shape 2 has minimum 1 and mean 2
+        count = max(1, round(degree / 2 * rng.paretovariate(2)))
+    return min(count, pages - 1)
+
+
+def random_link_graph(pages, degree=8, dangling=0.1, seed=0,
+                      distribution="power-law"):
+    """
+    Returns a random LinkGraph of `pages` pages, numbered page0, page1,
+    ..., with links drawn as random_rows draws them, for benchmarking
+    at scales no HTML corpus on disk reaches.
+    """
+    names = [f"page{i}" for i in range(pages)]
+    out_rows = list(random_rows(pages, degree, distribution, dangling, seed))
+    out_offsets, targets = _csr(out_rows)
+    del out_rows
+
+    # Fill the in-link rows by counting, sources in increasing order
+    offsets = array("i", [0]) * (pages + 1)
+    for i in targets:
+        offsets[i + 1] += 1
+    for i in range(pages):
+        offsets[i + 1] += offsets[i]
+    sources = array("i", [0]) * len(targets)
+    fill = array("i", offsets[:-1])
+    for j in range(pages):
+        for k in range(out_offsets[j], out_offsets[j + 1]):
+            i = targets[k]
+            sources[fill[i]] = j
+            fill[i] += 1
+    return LinkGraph(names, offsets, sources, out_offsets, targets)
+
+
+def write_corpus(directory, pages, degree=8, distribution="power-law",
+                 dangling=0.1, seed=0):
+    """
+    Writes a random corpus of `pages` HTML pages, page0.html,
+    page1.html, ..., to `directory`, laid out like the pages of corpus0
+    and with links drawn as random_rows draws them, and returns the
+    number of links written. The same arguments always write the same
+    corpus.
+    """
+    os.makedirs(directory, exist_ok=True)
+    links = 0
+    rows = random_rows(pages, degree, distribution, dangling, seed)
+    for j, row in enumerate(rows):
+        items = "".join(ITEM.format(page=f"page{i}") for i in row)
+        with open(os.path.join(directory, f"page{j}.html"), "w",
+                  encoding="utf-8") as f:
+            f.write(PAGE.format(page=f"page{j}", items=items))
+        links += len(row)
+    return links
+
+
+if __name__ == "__main__":
+    main()